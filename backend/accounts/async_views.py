@@ -0,0 +1,59 @@
+"""
+Async (ASGI) version of the Lightning invoice view
+
+Routed by `kiosk_backend.urls_asgi`; see `products.async_views`.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+from products.lightning_invoice import InvoiceError, get_invoice_service
+
+
+async def generate_lightning_invoice_view(request):
+    """
+    Generate Lightning Network invoice via LNURL
+    This acts as a proxy to avoid CORS issues when calling external Lightning services
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return JsonResponse({
+            'detail': '자격 인증데이터(authentication credentials)가 제공되지 않았습니다.'
+        }, status=403)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    ln_account = data.get('ln_account')
+    sats = data.get('sats')
+    memo = data.get('memo', 'Payment')
+
+    if not ln_account or not sats:
+        return JsonResponse({
+            'success': False,
+            'error': 'ln_account and sats are required',
+            'errorType': 'INVALID_REQUEST'
+        }, status=400)
+
+    try:
+        invoice = await get_invoice_service().arequest_invoice(ln_account, sats, comment=memo)
+    except InvoiceError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'errorType': e.error_type
+        }, status=e.status_code)
+
+    return JsonResponse({
+        'success': True,
+        'invoice': invoice
+    })
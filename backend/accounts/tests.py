@@ -0,0 +1,84 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from .models import User
+
+
+class AdminQueryTestCase(TestCase):
+    """관리자 사용자 API 테스트 공통 설정"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='x', is_kiosk_admin=True)
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.admin)
+
+    def seed(self, user_count, products_per_user):
+        """Create users that each own products in their own categories."""
+        start = User.objects.count()
+        users = User.objects.bulk_create([
+            User(username=f'user_{start + index}', email=f'user{start + index}@example.com')
+            for index in range(user_count)
+        ])
+        categories = Category.objects.bulk_create([
+            Category(name=f'category {index}') for index in range(products_per_user)
+        ])
+        Product.objects.bulk_create([
+            Product(name=f'product {index}', price=1, created_by=user, category=categories[index])
+            for user in users for index in range(products_per_user)
+        ])
+        return users
+
+    def get(self, url, params=None, queries=None):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+
+class AdminUsersListQueryTests(AdminQueryTestCase):
+    """사용자 목록 쿼리 수가 사용자/상품 수와 무관한지 확인"""
+
+    def test_query_count_does_not_grow_with_users(self):
+        # Count query + page query with the product counts annotated
+        self.seed(2, 2)
+        data = self.get(reverse('admin_users_list'), queries=2)
+        self.assertEqual(data['total_count'], 3)
+
+        self.seed(60, 10)
+        data = self.get(reverse('admin_users_list'), {'page_size': 50}, queries=2)
+        self.assertEqual(len(data['users']), 50)
+        self.assertTrue(all(user['product_count'] == 10 for user in data['users'] if user['id'] != self.admin.id))
+
+        data = self.get(reverse('admin_users_list'), {'search': 'user_'}, queries=2)
+        self.assertEqual(data['total_count'], 62)
+
+    def test_page_past_the_end_is_empty(self):
+        self.seed(3, 1)
+        data = self.get(reverse('admin_users_list'), {'page': 5}, queries=1)
+        self.assertEqual(data['users'], [])
+        self.assertFalse(data['has_next'])
+        self.assertEqual(data['total_count'], 4)
+
+
+class AdminUserDetailQueryTests(AdminQueryTestCase):
+    """사용자 상세 쿼리 수가 상품 수와 무관한지 확인"""
+
+    def test_query_count_does_not_grow_with_products(self):
+        # User + product count + page of products with their categories
+        user = self.seed(1, 2)[0]
+        data = self.get(reverse('admin_user_detail', args=[user.id]), queries=3)
+        self.assertEqual(len(data['products']), 2)
+
+        user = self.seed(1, 40)[0]
+        data = self.get(reverse('admin_user_detail', args=[user.id]), {'page_size': 30}, queries=3)
+        self.assertEqual(len(data['products']), 30)
+        self.assertTrue(all(product['category_name'] for product in data['products']))
+
+    def test_page_past_the_end_is_empty(self):
+        user = self.seed(1, 3)[0]
+        data = self.get(reverse('admin_user_detail', args=[user.id]), {'page': 2}, queries=2)
+        self.assertEqual(data['products'], [])
+        self.assertFalse(data['has_next'])
+        self.assertEqual(data['product_count'], 3)
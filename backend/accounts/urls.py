@@ -13,4 +13,5 @@ urlpatterns = [
     path('admin/users/', views.admin_users_list_view, name='admin_users_list'),
     path('admin/users/<int:user_id>/', views.admin_user_detail_view, name='admin_user_detail'),
     path('admin/users/<int:user_id>/delete/', views.admin_delete_user_view, name='admin_delete_user'),
+    path('admin/lightning/metrics/', views.admin_lightning_metrics_view, name='admin_lightning_metrics'),
 ]
@@ -3,12 +3,16 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
-from django.core.paginator import Paginator
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Count, Q
 from django.middleware.csrf import get_token
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer, UserProfileUpdateSerializer
 from .models import User
 from products.models import Product
-import requests
+from products.lightning_invoice import InvoiceError, get_invoice_service
+
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
 
 
 @api_view(['GET'])
@@ -152,11 +156,45 @@ def profile_update_view(request):
 
 
 # Admin-only views
+def _admin_page_size(request):
+    try:
+        page_size = int(request.query_params.get('page_size', ADMIN_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = ADMIN_PAGE_SIZE
+    return min(max(page_size, 1), ADMIN_MAX_PAGE_SIZE)
+
+
+def _page_info(page):
+    return {
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'has_next': page.has_next(),
+    }
+
+
+def _admin_page(paginator, request):
+    """
+    Objects and page info for ?page= (default 1)
+
+    A page past the end (e.g. after a user was deleted) is empty with
+    has_next false; get_page() would repeat the last page instead.
+    """
+    number = request.query_params.get('page') or 1
+    try:
+        page = paginator.page(number)
+    except PageNotAnInteger:
+        page = paginator.page(1)
+    except EmptyPage:
+        return [], {'page': int(number), 'num_pages': paginator.num_pages, 'has_next': False}
+    return page.object_list, _page_info(page)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def admin_users_list_view(request):
     """
-    관리자 전용: 모든 사용자 목록 조회
+    관리자 전용: 사용자 목록 조회 (페이지네이션)
+    Query params: page, page_size (최대 200), search (사용자명/이메일)
     """
     if not request.user.is_kiosk_admin:
         return Response({
@@ -165,20 +203,26 @@ def admin_users_list_view(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        # Get all users ordered by creation date
-        users = User.objects.all().order_by('-created_at')
+        # Product counts come from the same query as the users
+        users = User.objects.annotate(product_count=Count('product')).order_by('-created_at', '-id')
+        search = request.query_params.get('search', '').strip()
+        if search:
+            users = users.filter(Q(username__icontains=search) | Q(email__icontains=search))
+        
+        paginator = Paginator(users, _admin_page_size(request))
+        page_users, page_info = _admin_page(paginator, request)
         
-        # Add product count for each user
         users_data = []
-        for user in users:
+        for user in page_users:
             user_data = UserSerializer(user).data
-            user_data['product_count'] = Product.objects.filter(created_by=user).count()
+            user_data['product_count'] = user.product_count
             users_data.append(user_data)
         
         return Response({
             'success': True,
             'users': users_data,
-            'total_count': users.count()
+            'total_count': paginator.count,
+            **page_info
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -192,7 +236,8 @@ def admin_users_list_view(request):
 @permission_classes([permissions.IsAuthenticated])
 def admin_user_detail_view(request, user_id):
     """
-    관리자 전용: 특정 사용자 상세 정보 및 상품 목록 조회
+    관리자 전용: 특정 사용자 상세 정보 및 상품 목록 조회 (상품은 페이지네이션)
+    Query params: page, page_size (최대 200)
     """
     if not request.user.is_kiosk_admin:
         return Response({
@@ -202,14 +247,21 @@ def admin_user_detail_view(request, user_id):
     
     try:
         user = User.objects.get(id=user_id)
-        user_products = Product.objects.filter(created_by=user).order_by('-created_at')
+        user_products = (
+            Product.objects.filter(created_by=user)
+            .select_related('category')
+            .order_by('-created_at', '-id')
+        )
         
         # Serialize user data
         user_data = UserSerializer(user).data
         
-        # Serialize products data
+        # One page of products; the paginator's count is the product count
+        paginator = Paginator(user_products, _admin_page_size(request))
+        page_products, page_info = _admin_page(paginator, request)
+        
         products_data = []
-        for product in user_products:
+        for product in page_products:
             product_data = {
                 'id': product.id,
                 'name': product.name,
@@ -228,7 +280,8 @@ def admin_user_detail_view(request, user_id):
             'success': True,
             'user': user_data,
             'products': products_data,
-            'product_count': user_products.count()
+            'product_count': paginator.count,
+            **page_info
         }, status=status.HTTP_200_OK)
         
     except User.DoesNotExist:
@@ -288,6 +341,24 @@ def admin_delete_user_view(request, user_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def admin_lightning_metrics_view(request):
+    """
+    관리자 전용: Lightning 주소 도메인별 응답 시간 (현재 워커 기준)
+    """
+    if not request.user.is_kiosk_admin:
+        return Response({
+            'success': False,
+            'message': '관리자 권한이 필요합니다'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    return Response({
+        'success': True,
+        'domains': get_invoice_service().metrics.snapshot()
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def generate_lightning_invoice_view(request):
@@ -307,99 +378,14 @@ def generate_lightning_invoice_view(request):
                 'errorType': 'INVALID_REQUEST'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Parse Lightning address
-        if '@' not in ln_account:
-            return Response({
-                'success': False,
-                'error': 'Invalid Lightning address format',
-                'errorType': 'INVALID_REQUEST'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        ln_name, ln_domain = ln_account.split('@', 1)
-        lnurl_endpoint = f'https://{ln_domain}/.well-known/lnurlp/{ln_name}'
-
-        # Step 1: Get LNURL pay request details
         try:
-            lnurl_response = requests.get(lnurl_endpoint, timeout=10)
-            lnurl_response.raise_for_status()
-            lnurl_data = lnurl_response.json()
-        except requests.exceptions.RequestException as e:
-            return Response({
-                'success': False,
-                'error': f'Failed to connect to Lightning service: {str(e)}',
-                'errorType': 'NETWORK_ERROR'
-            }, status=status.HTTP_502_BAD_GATEWAY)
-
-        # Check for error response
-        if lnurl_data.get('status') == 'ERROR':
-            error_reason = lnurl_data.get('reason', 'Unknown error')
-            error_type = 'WALLET_NOT_FOUND' if 'wallet' in error_reason.lower() else 'INVALID_RESPONSE'
-            return Response({
-                'success': False,
-                'error': error_reason,
-                'errorType': error_type
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Validate response
-        if lnurl_data.get('tag') != 'payRequest':
-            return Response({
-                'success': False,
-                'error': 'Invalid LNURL response: missing payRequest tag',
-                'errorType': 'INVALID_RESPONSE'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Check amount limits
-        milli_sats = int(sats) * 1000
-        min_sendable = lnurl_data.get('minSendable', 0)
-        max_sendable = lnurl_data.get('maxSendable', 0)
-
-        if milli_sats < min_sendable or milli_sats > max_sendable:
+            invoice = get_invoice_service().request_invoice(ln_account, sats, comment=memo)
+        except InvoiceError as e:
             return Response({
                 'success': False,
-                'error': f'Amount {sats} sats is outside allowed range ({min_sendable // 1000} - {max_sendable // 1000} sats)',
-                'errorType': 'INVALID_AMOUNT'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Step 2: Request invoice
-        callback_url = lnurl_data.get('callback')
-        if not callback_url:
-            return Response({
-                'success': False,
-                'error': 'No callback URL in LNURL response',
-                'errorType': 'INVALID_RESPONSE'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            invoice_response = requests.get(
-                callback_url,
-                params={'amount': milli_sats, 'comment': memo},
-                timeout=10
-            )
-            invoice_response.raise_for_status()
-            invoice_data = invoice_response.json()
-        except requests.exceptions.RequestException as e:
-            return Response({
-                'success': False,
-                'error': f'Failed to generate invoice: {str(e)}',
-                'errorType': 'NETWORK_ERROR'
-            }, status=status.HTTP_502_BAD_GATEWAY)
-
-        # Check for error in invoice response
-        if invoice_data.get('status') == 'ERROR':
-            return Response({
-                'success': False,
-                'error': invoice_data.get('reason', 'Failed to generate invoice'),
-                'errorType': 'INVALID_RESPONSE'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Extract invoice
-        invoice = invoice_data.get('pr')
-        if not invoice:
-            return Response({
-                'success': False,
-                'error': 'No invoice returned from Lightning service',
-                'errorType': 'INVALID_RESPONSE'
-            }, status=status.HTTP_400_BAD_REQUEST)
+                'error': str(e),
+                'errorType': e.error_type
+            }, status=e.status_code)
 
         return Response({
             'success': True,
@@ -0,0 +1,22 @@
+"""
+ASGI config for kiosk_backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Cashu mint and LNURL proxy endpoints and the NUT-18 payment event stream
+are served by async views here (see ``kiosk_backend.urls_asgi``). This is
+how deploy.sh runs the backend:
+
+    DJANGO_SETTINGS_MODULE=kiosk_backend.settings_asgi \
+        gunicorn -k uvicorn.workers.UvicornWorker --workers 3 kiosk_backend.asgi:application
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kiosk_backend.settings_asgi')
+
+application = get_asgi_application()
@@ -108,6 +108,59 @@ MEDIA_ROOT = '/var/www/pos/media'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
+# Product images are streamed to a temp file in chunks of this size (products.uploads)
+IMAGE_UPLOAD_CHUNK_SIZE = config('IMAGE_UPLOAD_CHUNK_SIZE', default=64 * 1024, cast=int)
+# Raw uploads wait here (outside MEDIA_ROOT, never served) until the task worker sanitizes them
+IMAGE_PENDING_ROOT = config('IMAGE_PENDING_ROOT', default=str(BASE_DIR / 'media_pending'))
+
+# Cashu NUT-18 payment request storage (memory | database | redis)
+# 'memory' only works with a single worker process
+PAYMENT_REQUEST_STORE = config('PAYMENT_REQUEST_STORE', default='database')
+PAYMENT_REQUEST_REDIS_URL = config('PAYMENT_REQUEST_REDIS_URL', default='redis://127.0.0.1:6379/0')
+
+# Cache shared by all gunicorn workers on this host
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+    }
+}
+
+# Cashu mint keys cache lifetime before revalidating with the mint (seconds)
+MINT_KEYS_CACHE_TTL = config('MINT_KEYS_CACHE_TTL', default=300, cast=int)
+
+# LNURL-pay metadata cache for Lightning addresses (seconds)
+LNURL_CACHE_TTL = config('LNURL_CACHE_TTL', default=600, cast=int)
+LNURL_NEGATIVE_CACHE_TTL = config('LNURL_NEGATIVE_CACHE_TTL', default=30, cast=int)
+
+# Lightning address invoice service HTTP client
+LIGHTNING_HTTP_CONNECT_TIMEOUT = config('LIGHTNING_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+LIGHTNING_HTTP_READ_TIMEOUT = config('LIGHTNING_HTTP_READ_TIMEOUT', default=10, cast=float)
+LIGHTNING_HTTP_POOL_MAXSIZE = config('LIGHTNING_HTTP_POOL_MAXSIZE', default=10, cast=int)
+
+# Cashu mint proxy HTTP client (pooled keep-alive connections)
+MINT_HTTP_CONNECT_TIMEOUT = config('MINT_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+MINT_HTTP_READ_TIMEOUT = config('MINT_HTTP_READ_TIMEOUT', default=30, cast=float)
+MINT_HTTP_POOL_CONNECTIONS = config('MINT_HTTP_POOL_CONNECTIONS', default=10, cast=int)  # Mint hosts kept
+MINT_HTTP_POOL_MAXSIZE = config('MINT_HTTP_POOL_MAXSIZE', default=10, cast=int)  # Connections per host
+
+# Cached cart summary lifetime (seconds); cart changes retire it on commit
+CART_SUMMARY_CACHE_TTL = config('CART_SUMMARY_CACHE_TTL', default=300, cast=int)
+
+# Per-process product snapshot lifetime for anonymous session carts (seconds)
+PRODUCT_SNAPSHOT_CACHE_TTL = config('PRODUCT_SNAPSHOT_CACHE_TTL', default=30, cast=int)
+
+# Cached catalog payload lifetime (seconds); payloads are keyed by catalog version
+CATALOG_CACHE_TTL = config('CATALOG_CACHE_TTL', default=3600, cast=int)
+
+# Order numbers: distinct node ID (0-1295) per server sharing the database
+ORDER_NUMBER_NODE_ID = config('ORDER_NUMBER_NODE_ID', default=0, cast=int)
+
+# Background task queue (python manage.py run_task_worker)
+TASK_VISIBILITY_TIMEOUT = config('TASK_VISIBILITY_TIMEOUT', default=300, cast=int)
+TASK_MAX_ATTEMPTS = config('TASK_MAX_ATTEMPTS', default=5, cast=int)
+TASK_WORKER_POLL_SECONDS = config('TASK_WORKER_POLL_SECONDS', default=1.0, cast=float)
+TASK_FAILED_RETENTION_DAYS = config('TASK_FAILED_RETENTION_DAYS', default=7, cast=int)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,18 @@
+"""
+Django settings for the ASGI entry point (kiosk_backend.asgi).
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import IMAGE_UPLOAD_CHUNK_SIZE, MIDDLEWARE
+
+ROOT_URLCONF = 'kiosk_backend.urls_asgi'
+
+# WhiteNoise is sync-only and would force every async view back onto the
+# sync thread; nginx serves /static/ directly in production.
+MIDDLEWARE = [m for m in MIDDLEWARE if m != 'whitenoise.middleware.WhiteNoiseMiddleware']
+
+# The ASGI handler reads the whole request body before any upload handler
+# runs, into a SpooledTemporaryFile that stays in memory up to this size.
+# Spill to disk after one image chunk so an upload costs about as much
+# memory as under WSGI; other uploads go to temporary files as well.
+FILE_UPLOAD_MAX_MEMORY_SIZE = IMAGE_UPLOAD_CHUNK_SIZE
@@ -0,0 +1,32 @@
+"""
+URL configuration for the ASGI entry point.
+
+Upstream proxy endpoints (Cashu mints, LNURL, NUT-18 event stream) are
+routed to their async views; everything else falls through to
+kiosk_backend.urls.
+"""
+from django.urls import path
+from accounts import async_views as accounts_async_views
+from products import async_views as products_async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    # Cashu endpoints
+    path('api/cashu/keys/', products_async_views.cashu_keys_view, name='cashu_keys_direct'),
+    path('api/cashu/swap/', products_async_views.cashu_swap_view, name='cashu_swap_direct'),
+    path('api/cashu/melt/quote/', products_async_views.cashu_melt_quote_view, name='cashu_melt_quote_direct'),
+    path('api/cashu/melt/', products_async_views.cashu_melt_view, name='cashu_melt_direct'),
+    path('api/products/cashu/keys/', products_async_views.cashu_keys_view, name='cashu_keys'),
+    path('api/products/cashu/swap/', products_async_views.cashu_swap_view, name='cashu_swap'),
+    path('api/products/cashu/melt/quote/', products_async_views.cashu_melt_quote_view, name='cashu_melt_quote'),
+    path('api/products/cashu/melt/', products_async_views.cashu_melt_view, name='cashu_melt'),
+
+    # Lightning address / LNURL
+    path('api/lightningaddr/quote/', products_async_views.lightning_address_quote_view, name='lightning_address_quote_direct'),
+    path('api/products/lightningaddr/quote/', products_async_views.lightning_address_quote_view, name='lightning_address_quote'),
+    path('api/auth/lightning/invoice/', accounts_async_views.generate_lightning_invoice_view, name='generate_lightning_invoice'),
+
+    # Payment request proxy and NUT-18 payment event stream
+    path('api/payment-request-proxy/', products_async_views.payment_request_proxy_view, name='payment_request_proxy'),
+    path('api/products/payments/requests/<str:payment_id>/events/', products_async_views.nut18_payment_events_view, name='nut18_payment_events'),
+] + sync_urlpatterns
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, CartItem, Order, OrderItem
+from .models import Category, Product, CartItem, Order, OrderItem, BackgroundTask, ImageBlob
 
 
 @admin.register(Category)
@@ -11,11 +11,14 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category', 'regular_price', 'price', 'is_available', 'stock_quantity', 'created_at')
-    list_filter = ('category', 'is_available', 'created_at')
+    list_display = (
+        'name', 'category', 'regular_price', 'price', 'is_available', 'track_stock', 'stock_quantity', 'created_at'
+    )
+    list_editable = ('track_stock', 'stock_quantity')
+    list_filter = ('category', 'is_available', 'track_stock', 'created_at')
     search_fields = ('name', 'description')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('pending_image', 'created_at', 'updated_at')
 
 
 @admin.register(CartItem)
@@ -40,3 +43,19 @@ class OrderAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('order_number', 'created_at', 'updated_at')
     inlines = [OrderItemInline]
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'updated_at')
+    list_filter = ('status', 'name')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(ImageBlob)
+class ImageBlobAdmin(admin.ModelAdmin):
+    list_display = ('path', 'size', 'ref_count', 'created_at', 'updated_at')
+    search_fields = ('sha256', 'path')
+    ordering = ('-created_at',)
+    readonly_fields = ('sha256', 'path', 'size', 'ref_count', 'variants', 'created_at', 'updated_at')
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
-    verbose_name = '상품 관리'
\ No newline at end of file
+    verbose_name = '상품 관리'
+    
+    def ready(self):
+        # Connect catalog version and image refcount receivers, register background tasks
+        from . import blobs, catalog, tasks  # noqa: F401
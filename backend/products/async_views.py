@@ -0,0 +1,303 @@
+"""
+Async (ASGI) versions of the Cashu mint, LNURL and NUT-18 stream views
+
+These are routed by `kiosk_backend.urls_asgi` when the app is served through
+`kiosk_backend.asgi`. Waiting on a slow mint or Lightning service then only
+parks a coroutine instead of holding a sync worker, so product, cart and
+order requests keep flowing. Request validation and response bodies match
+the sync views in `products.views`.
+
+DRF 3.14 has no async view support, so these are plain Django views
+returning JsonResponse.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.http import (
+    HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+)
+
+from .keyset_cache import aget_mint_keys, anote_keyset_ids, output_keyset_ids
+from .lightning_invoice import InvoiceError, get_invoice_service
+from .mint_client import get_async_mint_client
+from .payment_store import PAYMENT_REQUEST_WAIT_POLL_SECONDS, get_payment_request_store
+from .views import (
+    PAYMENT_EVENTS_HEARTBEAT_SECONDS, PAYMENT_EVENTS_MAX_TIMEOUT_SECONDS,
+    PAYMENT_EVENTS_TIMEOUT_SECONDS, _paid_payment_response
+)
+
+
+def csrf_exempt(view_func):
+    # django.views.decorators.csrf.csrf_exempt wraps views in a sync function
+    # on Django 4.2, which would hide the coroutine from the handler
+    view_func.csrf_exempt = True
+    return view_func
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _error(message, status_code, **extra):
+    return JsonResponse({'success': False, 'error': message, **extra}, status=status_code)
+
+
+@csrf_exempt
+async def cashu_keys_view(request):
+    """
+    Proxy to get Cashu mint keys
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    mint_url = request.GET.get('mintUrl')
+    if not mint_url:
+        return _error('mintUrl parameter is required', 400)
+
+    try:
+        entry = await aget_mint_keys(mint_url)
+    except httpx.HTTPError as e:
+        return _error(f'Failed to fetch mint keys: {str(e)}', 502)
+
+    if request.headers.get('If-None-Match') == entry['etag']:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(entry['keys'], safe=False)
+    response['ETag'] = entry['etag']
+    return response
+
+
+@csrf_exempt
+async def cashu_swap_view(request):
+    """
+    Proxy to swap Cashu tokens
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    data = _json_body(request)
+    mint_url = data.get('mintUrl')
+    if not mint_url:
+        return _error('mintUrl is required', 400)
+
+    inputs = data.get('inputs')
+    outputs = data.get('outputs')
+    if not inputs or not outputs:
+        return _error('inputs and outputs are required', 400)
+
+    await anote_keyset_ids(mint_url, output_keyset_ids(outputs))
+    mint_client = get_async_mint_client()
+    swap_url = mint_client.url(mint_url, 'v1/swap')
+    try:
+        response = await mint_client.post(mint_url, 'v1/swap', {'inputs': inputs, 'outputs': outputs})
+        response.raise_for_status()
+        return JsonResponse(response.json(), safe=False)
+    except httpx.HTTPStatusError as e:
+        # Return mint's error directly for better UX
+        mint_error = None
+        error_code = None
+        try:
+            error_json = e.response.json()
+            mint_error = error_json.get('detail') or error_json.get('error')
+            error_code = error_json.get('code')
+        except (ValueError, AttributeError):
+            pass
+        return _error(
+            mint_error or f'Failed to swap tokens: {str(e)}',
+            e.response.status_code,
+            detail=e.response.text,
+            code=error_code,
+            mint_url=swap_url
+        )
+    except httpx.HTTPError as e:
+        return _error(f'Failed to swap tokens: {str(e)}', 502)
+
+
+@csrf_exempt
+async def cashu_melt_quote_view(request):
+    """
+    Proxy to get a melt quote (for paying Lightning invoices)
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    data = _json_body(request)
+    mint_url = data.get('mintUrl')
+    bolt11 = data.get('request') or data.get('invoice')
+    if not mint_url:
+        return _error('mintUrl is required', 400)
+    if not bolt11:
+        return _error('request or invoice is required', 400)
+
+    try:
+        response = await get_async_mint_client().post(
+            mint_url, 'v1/melt/quote/bolt11', {'request': bolt11, 'unit': 'sat'}
+        )
+        response.raise_for_status()
+        return JsonResponse(response.json(), safe=False)
+    except httpx.HTTPError as e:
+        return _error(f'Failed to get melt quote: {str(e)}', 502)
+
+
+@csrf_exempt
+async def cashu_melt_view(request):
+    """
+    Proxy to melt Cashu tokens (pay Lightning invoice)
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    data = _json_body(request)
+    mint_url = data.get('mintUrl')
+    quote = data.get('quote')
+    inputs = data.get('inputs')
+    outputs = data.get('outputs')
+    if not mint_url:
+        return _error('mintUrl is required', 400)
+    if not quote or not inputs:
+        return _error('quote and inputs are required', 400)
+
+    payload = {'quote': quote, 'inputs': inputs}
+    if outputs:
+        payload['outputs'] = outputs
+        await anote_keyset_ids(mint_url, output_keyset_ids(outputs))
+
+    try:
+        response = await get_async_mint_client().post(mint_url, 'v1/melt/bolt11', payload)
+        response.raise_for_status()
+        return JsonResponse(response.json(), safe=False)
+    except httpx.HTTPStatusError as e:
+        return _error(f'Failed to melt tokens: {str(e)}', 502, detail=e.response.text)
+    except httpx.HTTPError as e:
+        return _error(f'Failed to melt tokens: {str(e)}', 502)
+
+
+@csrf_exempt
+async def payment_request_proxy_view(request):
+    """
+    Proxy for NUT-18 payment requests to avoid CORS issues
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    data = _json_body(request)
+    target_url = data.get('url')
+    payload = data.get('payload')
+    if not target_url:
+        return _error('url is required', 400)
+    if not payload:
+        return _error('payload is required', 400)
+
+    try:
+        response = await get_async_mint_client().client.post(target_url, json=payload)
+        response.raise_for_status()
+        return JsonResponse({
+            'success': True,
+            'data': response.json() if response.content else {}
+        })
+    except httpx.HTTPError as e:
+        return _error(f'Payment request failed: {str(e)}', 502)
+    except ValueError as e:
+        return _error(f'Error processing payment request: {str(e)}', 500)
+
+
+@csrf_exempt
+async def lightning_address_quote_view(request):
+    """
+    Get Lightning invoice from Lightning address
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    data = _json_body(request)
+    address = data.get('address')
+    amount = data.get('amount')
+    if not address:
+        return _error('address is required', 400)
+    if not amount:
+        return _error('amount is required', 400)
+
+    try:
+        invoice = await get_invoice_service().arequest_invoice(address, amount)
+    except InvoiceError as e:
+        return _error(str(e), e.status_code)
+
+    return JsonResponse({
+        'success': True,
+        'request': invoice,
+        'invoice': invoice
+    })
+
+
+async def _wait_for_payment(store, payment_id, timeout):
+    """
+    Wait up to timeout seconds for payment data without blocking the loop
+
+    Push stores (Redis BLPOP, in-process condition) block in one executor
+    thread for the bounded wait. Other stores are re-checked every
+    PAYMENT_REQUEST_WAIT_POLL_SECONDS on the request's sync thread, so the
+    query uses the request's DB connection, which is closed with the request.
+    """
+    if store.push_wait:
+        return await sync_to_async(store.wait, thread_sensitive=False)(payment_id, timeout)
+
+    get_payment = sync_to_async(store.get)
+    deadline = time.monotonic() + timeout
+    while True:
+        data = await get_payment(payment_id)
+        remaining = deadline - time.monotonic()
+        if data or remaining <= 0:
+            return data
+        await asyncio.sleep(min(PAYMENT_REQUEST_WAIT_POLL_SECONDS, remaining))
+
+
+async def nut18_payment_events_view(request, payment_id):
+    """
+    Stream Cashu NUT-18 payment confirmation as Server-Sent Events
+
+    Sends a `paid` event as soon as proofs are POSTed to
+    nut18_payment_request_view, or a `timeout` event once the wait window
+    closes (EventSource reconnects on its own after `retry` ms). An open
+    stream only parks a coroutine; the sync view answers 204 instead.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        timeout = float(request.GET.get('timeout', PAYMENT_EVENTS_TIMEOUT_SECONDS))
+    except ValueError:
+        timeout = PAYMENT_EVENTS_TIMEOUT_SECONDS
+    timeout = max(1.0, min(timeout, PAYMENT_EVENTS_MAX_TIMEOUT_SECONDS))
+
+    store = get_payment_request_store()
+
+    async def event_stream():
+        yield 'retry: 1000\n\n'
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield 'event: timeout\ndata: {"paid": false}\n\n'
+                return
+            data = await _wait_for_payment(
+                store, payment_id, min(remaining, PAYMENT_EVENTS_HEARTBEAT_SECONDS)
+            )
+            if data:
+                yield f'event: paid\ndata: {json.dumps(_paid_payment_response(data))}\n\n'
+                return
+            if time.monotonic() < deadline:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx response buffering
+    return response
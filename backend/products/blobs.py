@@ -0,0 +1,169 @@
+"""
+Content-addressed product image storage
+
+Sanitized product images are stored once per content, named by their
+SHA-256 (``products/cas/ab/abcd....jpg``), and tracked by an `ImageBlob`
+row. The same photo uploaded for many products or merchants is therefore
+one file with one URL, and since a URL never changes content it can be
+cached forever (see the ``/media/products/cas/`` block in nginx.conf).
+The WebP variants of a blob live next to it and are rendered once.
+
+`ImageBlob.ref_count` counts the products using the blob. The signal
+receivers below keep it current for every save/delete, including cascades
+(e.g. deleting a user). Unreferenced blobs are not deleted right away: the
+periodic ``products.collect_image_blobs`` task removes those that have
+stayed unreferenced for BLOB_GRACE_SECONDS, which leaves time for an upload
+that is stored before its product is saved. Collection and `store_blob`
+both write the blob row first, so they serialize on it.
+
+Images stored before this scheme (``products/product_<uuid>.<ext>``) keep
+working and are not counted; `manage.py dedupe_product_images` moves them
+into the store.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ImageBlob, Product
+
+BLOB_DIR = 'products/cas'
+BLOB_GRACE_SECONDS = 60 * 60
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    MEDIA_ROOT storage that never renames: a name is a content hash, so an
+    existing file already holds the same bytes.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename, so concurrent writers and readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def is_blob_path(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+def blob_path(digest, extension):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}.{extension}'
+
+
+def store_blob(content, extension=None):
+    """
+    Store file content under its SHA-256 and return the blob path.
+
+    Storing content that already exists only refreshes the blob, which
+    keeps it from being collected before its product is saved.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        hasher.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+    digest = hasher.hexdigest()
+    extension = extension or os.path.splitext(content.name)[1].lstrip('.').lower()
+    path = blob_path(digest, extension)
+
+    with transaction.atomic():
+        blob, created = ImageBlob.objects.get_or_create(sha256=digest, defaults={'path': path, 'size': size})
+        if not created:
+            ImageBlob.objects.filter(pk=blob.pk).update(updated_at=timezone.now())
+        blob_storage.save(blob.path, content)
+    return blob.path
+
+
+def get_blob(name):
+    return ImageBlob.objects.filter(path=name).first() if is_blob_path(name) else None
+
+
+def save_blob_file(blob, suffix, data):
+    """Store a derived file (e.g. a variant) next to the blob; returns its path."""
+    stem = os.path.splitext(blob.path)[0]
+    return blob_storage.save(f'{stem}{suffix}', ContentFile(data))
+
+
+def _adjust_ref_count(name, delta):
+    if not is_blob_path(name):
+        return
+    blobs = ImageBlob.objects.filter(path=name)
+    if delta < 0:
+        blobs = blobs.filter(ref_count__gte=-delta)
+    blobs.update(ref_count=F('ref_count') + delta, updated_at=timezone.now())
+
+
+def collect_image_blobs(grace_seconds=BLOB_GRACE_SECONDS):
+    """Delete blobs (and their variants) unreferenced for grace_seconds; returns the count."""
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    deleted = 0
+    for blob_id in ImageBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list('id', flat=True):
+        with transaction.atomic():
+            blob = ImageBlob.objects.filter(id=blob_id).first()
+            removed, _ = ImageBlob.objects.filter(id=blob_id, ref_count=0, updated_at__lt=cutoff).delete()
+            if blob is None or not removed:
+                # Stored or referenced again meanwhile
+                continue
+            for variant in blob.variants.values():
+                blob_storage.delete(variant['path'])
+            blob_storage.delete(blob.path)
+            deleted += 1
+    return deleted
+
+
+@receiver(pre_save, sender=Product)
+def _product_saving(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        instance._previous_image = None
+        return
+    previous = ''
+    if instance.pk:
+        previous = Product.objects.filter(pk=instance.pk).values_list('image', flat=True).first() or ''
+    instance._previous_image = previous
+
+
+@receiver(post_save, sender=Product)
+def _product_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    current = instance.image.name or ''
+    if previous is None or previous == current:
+        return
+    _adjust_ref_count(current, 1)
+    _adjust_ref_count(previous, -1)
+
+
+@receiver(post_delete, sender=Product)
+def _product_deleted(sender, instance, **kwargs):
+    _adjust_ref_count(instance.image.name or '', -1)
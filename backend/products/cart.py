@@ -0,0 +1,525 @@
+"""
+Database cart service for authenticated users
+
+A cart read loads all lines with their products in one query
+(`select_related('product')`) and computes the subtotal with one aggregate
+query. The resulting summary (`items`, `subtotal`, `item_count`) is kept in
+the shared Django cache per user, so repeated reads cost no queries until
+the cart changes.
+
+Summaries are keyed by a per-user cart generation. All cart mutations go
+through the functions below, which bump the generation after commit, so a
+read that loaded the old rows can only fill a key nobody reads any more.
+Product and category saves/deletes from any path (API, admin, background
+tasks) bump the generation of every cart holding an affected product
+(`invalidate_product_carts`, called by the receivers in
+`products.catalog`); ``CART_SUMMARY_CACHE_TTL`` bounds staleness from
+queryset updates that bypass signals.
+
+Anonymous session carts resolve all their products with one
+`filter(id__in=...)` through a per-process snapshot cache
+(`get_product_snapshots`). Snapshots live for ``PRODUCT_SNAPSHOT_CACHE_TTL``
+seconds; other workers do not see local invalidations, so keep it short.
+
+`apply_cart_operations` / `apply_session_cart_operations` apply a list of
+add/set/remove operations in one go (one transaction or one session write).
+Operations name a product, or an existing line by its cart item ID, which
+is how custom amount lines are changed.
+"""
+
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CartItem, Product
+from .serializers import CartItemSerializer
+
+CART_SUMMARY_CACHE_PREFIX = 'cart:summary:'
+CART_GENERATION_CACHE_PREFIX = 'cart:generation:'
+PRODUCT_SNAPSHOT_MAX_ENTRIES = 10000
+CART_OPERATION_ACTIONS = ('add', 'set', 'remove')
+CART_ITEM_KEY = 'item'
+MAX_CART_OPERATIONS = 200
+
+
+class CartError(Exception):
+    """
+    Invalid cart request with the HTTP status to return
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _generation_key(user_id):
+    return f'{CART_GENERATION_CACHE_PREFIX}{user_id}'
+
+
+def _new_generation():
+    # Never reuses an old summary key when the counter was evicted or expired
+    return time.time_ns()
+
+
+def _cart_generation(user_id):
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_cart_generation(user_id):
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_generation(), None)
+
+
+def _cache_key(user_id, generation):
+    return f'{CART_SUMMARY_CACHE_PREFIX}{user_id}:{generation}'
+
+
+def cart_items(user):
+    """Cart lines for a user with their products loaded."""
+    return CartItem.objects.filter(user=user).select_related('product').order_by('id')
+
+
+def cart_subtotal(user):
+    """Sum of quantity * unit price over the user's cart, computed by the database."""
+    subtotal = CartItem.objects.filter(user=user).aggregate(
+        subtotal=Sum(
+            F('quantity') * Coalesce('custom_price', 'product__price'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+    )['subtotal']
+    # SQLite drops the decimal scale; keep the two places of the price column
+    return (subtotal or Decimal('0')).quantize(Decimal('0.01'))
+
+
+def get_cart_summary(user):
+    """
+    Return {'items': [...], 'subtotal': str, 'item_count': int} for the user's cart.
+    """
+    # Read the generation before the rows, so a concurrent change retires this key
+    cache_key = _cache_key(user.id, _cart_generation(user.id))
+    summary = cache.get(cache_key)
+    if summary is None:
+        items = list(CartItemSerializer(cart_items(user), many=True).data)
+        summary = {
+            'items': items,
+            'subtotal': str(cart_subtotal(user)),
+            'item_count': len(items),
+        }
+        cache.set(cache_key, summary, getattr(settings, 'CART_SUMMARY_CACHE_TTL', 300))
+    return summary
+
+
+def invalidate_cart(user_id):
+    """Retire the cached cart summary for a user once the change commits."""
+    transaction.on_commit(lambda: _bump_cart_generation(user_id))
+
+
+def invalidate_product_carts(product_ids):
+    """Retire the cached summaries of every cart that holds one of the products."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    snapshots = _get_snapshot_cache()
+    for product_id in product_ids:
+        snapshots.invalidate(product_id)
+    user_ids = set(CartItem.objects.filter(product_id__in=product_ids).values_list('user_id', flat=True))
+    for user_id in user_ids:
+        invalidate_cart(user_id)
+
+
+def add_to_cart(user, product, quantity=1):
+    """Add quantity of a product to the user's cart and return the cart line."""
+    cart_item, created = CartItem.objects.get_or_create(
+        user=user,
+        product=product,
+        defaults={'quantity': quantity}
+    )
+    if not created:
+        cart_item.quantity += quantity
+        cart_item.save()
+    invalidate_cart(user.id)
+    return cart_item
+
+
+def add_custom_item(user, name, price):
+    """Add a custom amount line (no Product row) to the user's cart."""
+    cart_item = CartItem.objects.create(user=user, custom_name=name, custom_price=price, quantity=1)
+    invalidate_cart(user.id)
+    return cart_item
+
+
+def set_cart_item_quantity(cart_item, quantity):
+    """
+    Set a cart line's quantity; zero or less removes it.
+
+    Returns the cart line, or None if it was removed.
+    """
+    if quantity <= 0:
+        remove_cart_item(cart_item)
+        return None
+    cart_item.quantity = quantity
+    cart_item.save()
+    invalidate_cart(cart_item.user_id)
+    return cart_item
+
+
+def remove_cart_item(cart_item):
+    cart_item.delete()
+    invalidate_cart(cart_item.user_id)
+
+
+def clear_cart(user):
+    CartItem.objects.filter(user=user).delete()
+    invalidate_cart(user.id)
+
+
+class ProductSnapshotCache:
+    """
+    In-process cache of available product snapshots for session carts
+
+    Unavailable or missing products are cached as None so stale session
+    entries do not hit the database on every read.
+    """
+
+    def __init__(self, ttl=30, max_entries=PRODUCT_SNAPSHOT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, product_ids):
+        """Return {product_id: snapshot or None}, loading misses in one query."""
+        now = time.monotonic()
+        snapshots = {}
+        missing = []
+        with self._lock:
+            for product_id in set(product_ids):
+                entry = self._entries.get(product_id)
+                if entry and entry[0] > now:
+                    snapshots[product_id] = entry[1]
+                else:
+                    missing.append(product_id)
+
+        if missing:
+            loaded = {
+                product.id: _product_snapshot(product)
+                for product in Product.objects.filter(id__in=missing, is_available=True)
+            }
+            with self._lock:
+                if len(self._entries) + len(missing) > self.max_entries:
+                    self._entries.clear()
+                for product_id in missing:
+                    snapshots[product_id] = loaded.get(product_id)
+                    self._entries[product_id] = (now + self.ttl, snapshots[product_id])
+        return snapshots
+
+    def invalidate(self, product_id):
+        with self._lock:
+            self._entries.pop(product_id, None)
+
+
+def _product_snapshot(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'image_url': product.image.url if product.image else None,
+    }
+
+
+_snapshot_cache = None
+_snapshot_cache_lock = threading.Lock()
+
+
+def _get_snapshot_cache():
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        with _snapshot_cache_lock:
+            if _snapshot_cache is None:
+                _snapshot_cache = ProductSnapshotCache(getattr(settings, 'PRODUCT_SNAPSHOT_CACHE_TTL', 30))
+    return _snapshot_cache
+
+
+def session_product_id(key):
+    """Product ID of a regular session cart key, or None for custom keys."""
+    try:
+        return int(key)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_product_snapshots(product_ids):
+    """Return {product_id: snapshot} for the available products among product_ids (None skipped)."""
+    snapshots = _get_snapshot_cache().get_many(
+        product_id for product_id in product_ids if product_id is not None
+    )
+    return {product_id: snapshot for product_id, snapshot in snapshots.items() if snapshot}
+
+
+def session_cart_item(key, entry, snapshots):
+    """
+    Return (item, total_price) for one session cart entry, or None if it is invalid.
+
+    Regular entries are priced from `snapshots` (see get_product_snapshots).
+    """
+    try:
+        quantity = entry['quantity']
+        if entry.get('is_custom'):
+            price = Decimal(str(entry['price']))
+            product = {
+                'id': key,
+                'name': entry['name'],
+                'price': str(entry['price']),
+                'image_url': None,
+            }
+        else:
+            snapshot = snapshots.get(session_product_id(key))
+            if snapshot is None:
+                return None
+            price = snapshot['price']
+            product = {
+                'id': snapshot['id'],
+                'name': snapshot['name'],
+                'price': str(price),
+                'image_url': snapshot['image_url'],
+            }
+        total_price = price * quantity
+    except (AttributeError, KeyError, TypeError, InvalidOperation):
+        return None
+
+    item = {
+        'id': f"session_{key}",
+        'product': product,
+        'quantity': quantity,
+        'total_price': str(total_price)
+    }
+    if entry.get('is_custom'):
+        item['is_custom'] = True
+    return item, total_price
+
+
+def get_session_cart_summary(session_cart):
+    """
+    Return {'items': [...], 'subtotal': str, 'item_count': int} for a session cart.
+
+    Regular products are resolved with at most one query for the whole cart.
+    """
+    snapshots = get_product_snapshots(map(session_product_id, session_cart))
+    items = []
+    subtotal = Decimal('0')
+    for key, entry in session_cart.items():
+        result = session_cart_item(key, entry, snapshots)
+        if result:
+            items.append(result[0])
+            subtotal += result[1]
+    return {
+        'items': items,
+        'subtotal': str(subtotal),
+        'item_count': len(items),
+    }
+
+
+def parse_cart_operations(operations):
+    """
+    Validate a batch of cart operations.
+
+    Each operation is {'action': 'add'|'set'|'remove', 'product_id': ..., 'quantity': int}.
+    set/remove may give the line's cart item `item_id` instead of product_id.
+    Returns a list of (action, key, quantity) tuples, where key is a product
+    ID, a session cart key or ('item', item_id); raises CartError.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CartError('operations 목록이 필요합니다.')
+    if len(operations) > MAX_CART_OPERATIONS:
+        raise CartError(f'한 번에 최대 {MAX_CART_OPERATIONS}개의 작업만 처리할 수 있습니다.')
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('action') not in CART_OPERATION_ACTIONS:
+            raise CartError(f'{index}번째 작업: action은 add, set, remove 중 하나여야 합니다.')
+        action = operation['action']
+        product_id = operation.get('product_id')
+        item_id = operation.get('item_id')
+        if item_id not in (None, '') and action != 'add':
+            key = (CART_ITEM_KEY, item_id)
+        elif product_id in (None, ''):
+            raise CartError(f'{index}번째 작업: product_id가 필요합니다.')
+        else:
+            # Custom session items are keyed by strings like 'custom_1a2b3c4d'
+            product_key = session_product_id(product_id)
+            key = product_key if product_key is not None else str(product_id)
+        try:
+            quantity = int(operation.get('quantity', 1 if action == 'add' else 0))
+        except (TypeError, ValueError):
+            raise CartError(f'{index}번째 작업: 수량은 정수여야 합니다.')
+        if (action == 'add' and quantity < 1) or quantity < 0:
+            raise CartError(f'{index}번째 작업: 올바른 수량을 입력해주세요.')
+        parsed.append((action, key, quantity))
+    return parsed
+
+
+def _is_item_key(key):
+    return isinstance(key, tuple)
+
+
+def _resolve_item_keys(operations, resolve):
+    """Replace ('item', item_id) keys with resolve(item_id)."""
+    return [
+        (action, resolve(key[1]) if _is_item_key(key) else key, quantity)
+        for action, key, quantity in operations
+    ]
+
+
+def _final_quantities(current, operations):
+    quantities = dict(current)
+    for action, product_id, quantity in operations:
+        if action == 'add':
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        elif action == 'set':
+            quantities[product_id] = quantity
+        else:
+            quantities[product_id] = 0
+    return quantities
+
+
+def _products_to_check(current, operations):
+    # Adds must target an available product, like cart_view POST; sets may
+    # also create a line, so they are checked unless the line already exists
+    return {
+        product_id for action, product_id, _ in operations
+        if action == 'add' or (action == 'set' and product_id not in current)
+    }
+
+
+def apply_cart_operations(user, operations):
+    """
+    Apply parsed operations to the user's database cart in one transaction.
+
+    Raises CartError (nothing is changed) if a product or line is not found.
+    """
+    if any(isinstance(key, str) for _, key, _ in operations):
+        # Session cart keys ('custom_...') do not exist in database carts
+        raise CartError('상품을 찾을 수 없습니다.', 404)
+
+    for attempt in range(2):
+        try:
+            _apply_cart_operations(user, operations)
+            break
+        except IntegrityError:
+            # A concurrent batch inserted one of the new lines first; the
+            # retry locks and updates that row instead
+            if attempt:
+                raise CartError('장바구니가 동시에 변경되었습니다. 다시 시도해주세요.', 409)
+
+    invalidate_cart(user.id)
+
+
+def _line_key(line):
+    # Custom lines have no product and are only reachable by their item ID
+    return line.product_id if line.product_id is not None else (CART_ITEM_KEY, line.id)
+
+
+def _apply_cart_operations(user, operations):
+    """Run one attempt of apply_cart_operations."""
+    with transaction.atomic():
+        item_lines = {}
+        item_ids = [key[1] for _, key, _ in operations if _is_item_key(key)]
+        if item_ids:
+            if not all(str(item_id).isdigit() for item_id in item_ids):
+                raise CartError('장바구니 아이템을 찾을 수 없습니다.', 404)
+            item_ids = {int(item_id) for item_id in item_ids}
+            item_lines = CartItem.objects.select_for_update().filter(user=user).in_bulk(item_ids)
+            if item_ids - set(item_lines):
+                raise CartError('장바구니 아이템을 찾을 수 없습니다.', 404)
+            # A product line named by item ID is the same line as its product_id
+            operations = _resolve_item_keys(operations, lambda item_id: _line_key(item_lines[int(item_id)]))
+
+        product_ids = {key for _, key, _ in operations if not _is_item_key(key)}
+        lines = {
+            line.product_id: line
+            for line in CartItem.objects.select_for_update().filter(user=user, product_id__in=product_ids)
+        }
+        lines.update((_line_key(line), line) for line in item_lines.values())
+        current = {key: line.quantity for key, line in lines.items()}
+        quantities = _final_quantities(current, operations)
+
+        to_check = _products_to_check(current, operations)
+        available = set(Product.objects.filter(id__in=to_check, is_available=True).values_list('id', flat=True))
+        if to_check - available:
+            raise CartError('상품을 찾을 수 없습니다.', 404)
+
+        now = timezone.now()
+        to_create, to_update, to_delete = [], [], []
+        for key, quantity in quantities.items():
+            line = lines.get(key)
+            if line is None:
+                # Only product keys can lack a line; item keys were checked above
+                if quantity > 0:
+                    to_create.append(CartItem(user=user, product_id=key, quantity=quantity))
+            elif quantity <= 0:
+                to_delete.append(line.id)
+            elif quantity != line.quantity:
+                line.quantity = quantity
+                line.updated_at = now  # bulk_update skips auto_now
+                to_update.append(line)
+
+        CartItem.objects.bulk_create(to_create)
+        CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+        CartItem.objects.filter(id__in=to_delete).delete()
+
+
+def _session_item_key(session_cart, item_id):
+    # Session cart item IDs are 'session_<cart key>' (see session_cart_item)
+    item_id = str(item_id)
+    key = item_id[len('session_'):]
+    if not item_id.startswith('session_') or key not in session_cart:
+        raise CartError('장바구니 아이템을 찾을 수 없습니다.', 404)
+    product_id = session_product_id(key)
+    return product_id if product_id is not None else key
+
+
+def apply_session_cart_operations(session_cart, operations):
+    """
+    Apply parsed operations to a session cart dict and return the new cart.
+
+    Raises CartError (the input is not modified) if a product or line is not found.
+    """
+    operations = _resolve_item_keys(operations, lambda item_id: _session_item_key(session_cart, item_id))
+    current = {}
+    for key, entry in session_cart.items():
+        product_id = session_product_id(key)
+        current[product_id if product_id is not None else key] = entry.get('quantity', 0)
+    quantities = _final_quantities(current, operations)
+
+    to_check = _products_to_check(current, operations)
+    if any(not isinstance(product_id, int) for product_id in to_check):
+        # Custom items can only be changed, not created, here
+        raise CartError('상품을 찾을 수 없습니다.', 404)
+    if to_check - set(get_product_snapshots(to_check)):
+        raise CartError('상품을 찾을 수 없습니다.', 404)
+
+    new_cart = {}
+    for key, entry in session_cart.items():
+        product_id = session_product_id(key)
+        quantity = quantities.pop(product_id if product_id is not None else key)
+        if quantity > 0:
+            new_cart[key] = {**entry, 'quantity': quantity}
+    for product_id, quantity in quantities.items():
+        if quantity > 0:
+            new_cart[str(product_id)] = {'quantity': quantity}
+    return new_cart
@@ -0,0 +1,208 @@
+"""
+Versioned merchant catalog
+
+Every merchant has a catalog version (`CatalogVersion`) that is bumped on
+each Product or Category write:
+
+- model saves/deletes through the signal receivers below (views, admin,
+  cascades)
+- queryset updates that skip signals call `record_catalog_changes`
+  directly
+
+Stock is volatile and not part of the catalog payload
+(`CatalogProductSerializer`), so the order stock decrement does not bump
+the version.
+
+Catalog list endpoints answer through `catalog_response`, which sends a
+strong ETag derived from the version and answers `If-None-Match` with 304.
+The serialized payload is cached per (merchant, version, category), so a
+version bump invalidates it without touching the cache.
+
+The same receivers drop the cached cart summaries holding the written
+products (`products.cart.invalidate_product_carts`).
+
+Each write also stamps the changed objects with the new version in
+`CatalogChange` (one row per object; deletes leave a tombstone), so
+`catalog_changes(merchant_id, since)` can list what changed after any
+version a kiosk has already synced.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cart import invalidate_product_carts
+from .models import Category, CatalogChange, CatalogVersion, Product
+
+CATALOG_CACHE_PREFIX = 'catalog:payload:'
+
+User = get_user_model()
+
+
+def get_catalog_version(merchant_id):
+    """Current catalog version of a merchant (0 before the first write)."""
+    version = CatalogVersion.objects.filter(merchant_id=merchant_id).values_list('version', flat=True).first()
+    return version or 0
+
+
+def _increment_version(merchant_id):
+    updated = CatalogVersion.objects.filter(merchant_id=merchant_id).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        _, created = CatalogVersion.objects.get_or_create(merchant_id=merchant_id, defaults={'version': 1})
+        if not created:
+            # Another worker created it first
+            CatalogVersion.objects.filter(merchant_id=merchant_id).update(
+                version=F('version') + 1, updated_at=timezone.now()
+            )
+    return get_catalog_version(merchant_id)
+
+
+def record_catalog_changes(merchant_id, kind, object_ids, deleted=False):
+    """
+    Bump a merchant's catalog version and stamp the objects with it.
+
+    `kind` is 'product' or 'category'; deleted=True records tombstones.
+    """
+    object_ids = set(object_ids)
+    if not merchant_id or not object_ids:
+        return
+    with transaction.atomic():
+        version = _increment_version(merchant_id)
+        CatalogChange.objects.bulk_create(
+            [
+                CatalogChange(merchant_id=merchant_id, kind=kind, object_id=object_id,
+                              version=version, deleted=deleted)
+                for object_id in object_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['merchant', 'kind', 'object_id'],
+            update_fields=['version', 'deleted'],
+        )
+
+
+def catalog_changes(merchant_id, since):
+    """
+    Objects changed after version `since`, as {kind: {object_id: deleted}}.
+    """
+    changes = {'product': {}, 'category': {}}
+    rows = CatalogChange.objects.filter(merchant_id=merchant_id, version__gt=since)
+    for kind, object_id, deleted in rows.values_list('kind', 'object_id', 'deleted'):
+        changes[kind][object_id] = deleted
+    return changes
+
+
+def catalog_response(request, view_name, build_payload):
+    """
+    Return a cached, ETag-validated catalog Response for request.user.
+
+    `build_payload(version)` is only called on a cache miss; its result
+    must be picklable (plain lists/dicts). Responses vary on the `category`
+    and `since` query parameters.
+    """
+    merchant_id = request.user.id
+    category = request.query_params.get('category') or ''
+    since = request.query_params.get('since') or ''
+    version = get_catalog_version(merchant_id)
+    digest = hashlib.sha256(
+        f'{view_name}:{merchant_id}:{version}:{category}:{since}'.encode('utf-8')
+    ).hexdigest()[:32]
+    etag = f'"{digest}"'
+
+    if etag in _if_none_match(request):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        # Absolute image URLs depend on the host the catalog was requested through
+        cache_key = f'{CATALOG_CACHE_PREFIX}{digest}:{request.get_host()}'
+        payload = cache.get(cache_key)
+        if payload is None:
+            payload = build_payload(version)
+            cache.set(cache_key, payload, getattr(settings, 'CATALOG_CACHE_TTL', 3600))
+        response = Response(payload)
+
+    response['ETag'] = etag
+    # Let browsers keep the copy but revalidate it on every load
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _if_none_match(request):
+    header = request.headers.get('If-None-Match', '')
+    return {tag.strip() for tag in header.split(',') if tag.strip()}
+
+
+def _category_product_ids(category):
+    """{merchant_id: product IDs} for the products in a category (plus its owner)."""
+    product_ids = {category.created_by_id: set()} if category.created_by_id else {}
+    for product_id, merchant_id in Product.objects.filter(category=category).values_list('id', 'created_by_id'):
+        if merchant_id:
+            product_ids.setdefault(merchant_id, set()).add(product_id)
+    return product_ids
+
+
+def _record_category_change(category, product_ids, deleted=False):
+    # Products of other merchants can use global categories, and their
+    # payload carries category_name, so they count as changed too
+    for merchant_id, merchant_product_ids in product_ids.items():
+        with transaction.atomic():
+            record_catalog_changes(merchant_id, 'category', [category.id], deleted=deleted)
+            record_catalog_changes(merchant_id, 'product', merchant_product_ids)
+
+
+def _deleted_merchant_ids(origin):
+    """IDs of the users whose deletion (instance or queryset) started a cascade."""
+    if isinstance(origin, User):
+        return {origin.pk}
+    if isinstance(origin, QuerySet) and origin.model is User:
+        return set(origin.values_list('pk', flat=True))
+    return set()
+
+
+@receiver(post_save, sender=Product)
+def _product_saved(sender, instance, **kwargs):
+    record_catalog_changes(instance.created_by_id, 'product', [instance.id])
+    invalidate_product_carts([instance.id])
+
+
+@receiver(pre_delete, sender=Product)
+def _product_deleting(sender, instance, **kwargs):
+    # Cart lines cascade with the product, so look them up first
+    invalidate_product_carts([instance.id])
+
+
+@receiver(post_delete, sender=Product)
+def _product_deleted(sender, instance, **kwargs):
+    record_catalog_changes(instance.created_by_id, 'product', [instance.id], deleted=True)
+
+
+@receiver(post_save, sender=Category)
+def _category_saved(sender, instance, **kwargs):
+    product_ids = _category_product_ids(instance)
+    _record_category_change(instance, product_ids)
+    invalidate_product_carts(set().union(*product_ids.values()))
+
+
+@receiver(pre_delete, sender=Category)
+def _category_deleting(sender, instance, origin=None, **kwargs):
+    # Looked up before the delete nulls the products' category
+    instance._catalog_product_ids = _category_product_ids(instance)
+    # Cascade from deleting the merchant: its catalog rows go too, and a new
+    # version row would fail its foreign key at commit
+    for merchant_id in _deleted_merchant_ids(origin):
+        instance._catalog_product_ids.pop(merchant_id, None)
+    invalidate_product_carts(set().union(*instance._catalog_product_ids.values()))
+
+
+@receiver(post_delete, sender=Category)
+def _category_deleted(sender, instance, **kwargs):
+    _record_category_change(instance, getattr(instance, '_catalog_product_ids', {}), deleted=True)
@@ -0,0 +1,221 @@
+"""
+Product image pipeline (Pillow)
+
+Uploads are decoded once with Pillow, which validates the real format
+instead of trusting the data URL header or file extension. The request only
+runs `validate_upload` (size and header, no pixel decoding) and stages the
+raw file (`products.uploads.stage_upload`); the rest runs in the task
+worker (``products.process_product_image``):
+
+1. `process_upload` decodes the bytes, applies the EXIF orientation and
+   re-encodes a master image (JPEG, or PNG when it has transparency)
+   without any metadata. That master is stored content-addressed
+   (`products.blobs`) and becomes `Product.image`.
+2. `save_image_variants` renders WebP variants from the master
+   (``IMAGE_VARIANTS``: thumb/grid/detail by longest edge) and records them
+   in `Product.image_variants`, which backs the srcset map in the API.
+"""
+
+import io
+import os
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .blobs import get_blob, is_blob_path, save_blob_file
+from .models import ImageBlob
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000  # Rejects decompression bombs well before Pillow's own limit
+MAX_HEADER_BYTES = 256 * 1024  # Format and size must be readable from this much data (EXIF/ICC included)
+MASTER_MAX_EDGE = 2048
+IMAGE_VARIANTS = {
+    'thumb': 160,
+    'grid': 480,
+    'detail': 1200,
+}
+VARIANT_DIR = 'products/variants'
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+class InvalidImage(ValueError):
+    """Upload is not a supported, decodable image."""
+
+
+class ProcessedImage:
+    """
+    Decoded upload: the sanitized master file plus the decoded image for variants
+    """
+
+    def __init__(self, image, master):
+        self.image = image
+        self.master = master
+
+
+def check_image_header(data):
+    """
+    Validate the format and dimensions from the first bytes of an upload.
+
+    Returns False when `data` is too short to tell yet, True once the header
+    is acceptable; raises InvalidImage otherwise. Pixels are not decoded.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format, width, height = image.format, image.width, image.height
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as e:
+        if len(data) < MAX_HEADER_BYTES and not isinstance(e, Image.DecompressionBombError):
+            return False
+        raise InvalidImage(f'이미지를 읽을 수 없습니다: {str(e)}')
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidImage(f'지원되지 않는 이미지 형식입니다: {image_format}')
+    if width * height > MAX_IMAGE_PIXELS:
+        raise InvalidImage('이미지 해상도가 너무 큽니다.')
+    return True
+
+
+def validate_upload(data):
+    """
+    Check the size, format and dimensions of an upload without decoding it.
+
+    `data` is bytes or a file; raises InvalidImage. Full decoding (truncated
+    or corrupt pixel data) is left to `process_upload` in the task worker.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        size, header = len(data), bytes(data[:MAX_HEADER_BYTES])
+    else:
+        size = data.size
+        data.seek(0)
+        header = data.read(MAX_HEADER_BYTES)
+        data.seek(0)
+    if size > MAX_IMAGE_BYTES:
+        raise InvalidImage('이미지 파일이 너무 큽니다. 최대 5MB까지 업로드 가능합니다.')
+    if not check_image_header(header):
+        raise InvalidImage('이미지를 읽을 수 없습니다.')
+
+
+def decode_image(data):
+    """
+    Decode image bytes (or a binary file object) and return an RGB/RGBA image.
+
+    Raises InvalidImage for anything that is not a fully decodable image in
+    ALLOWED_FORMATS.
+    """
+    source = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    try:
+        with Image.open(source) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise InvalidImage(f'지원되지 않는 이미지 형식입니다: {image.format}')
+            if image.width * image.height > MAX_IMAGE_PIXELS:
+                raise InvalidImage('이미지 해상도가 너무 큽니다.')
+            # First frame only for animated GIF/WebP; load() decodes every byte
+            image.load()
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+            return image.convert('RGBA' if has_alpha else 'RGB')
+    except InvalidImage:
+        raise
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise InvalidImage(f'이미지를 읽을 수 없습니다: {str(e)}')
+
+
+def _encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def _resized(image, max_edge):
+    if max(image.size) <= max_edge:
+        return image
+    resized = image.copy()
+    resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    return resized
+
+
+def encode_master(image):
+    """Re-encode a decoded image as a metadata-free JPEG/PNG; return (bytes, extension)."""
+    master = _resized(image, MASTER_MAX_EDGE)
+    if master.mode == 'RGBA':
+        return _encode(master, 'PNG', optimize=True), 'png'
+    return _encode(master, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True), 'jpg'
+
+
+def process_upload(data):
+    """
+    Validate and sanitize an uploaded image; returns a ProcessedImage.
+
+    `data` is bytes or an uploaded file, which Pillow reads from where it is
+    (e.g. the temporary file of a streamed upload) without loading it whole.
+    """
+    size = len(data) if isinstance(data, (bytes, bytearray)) else data.size
+    if size > MAX_IMAGE_BYTES:
+        raise InvalidImage('이미지 파일이 너무 큽니다. 최대 5MB까지 업로드 가능합니다.')
+    image = decode_image(data)
+    master, extension = encode_master(image)
+    return ProcessedImage(image, ContentFile(master, name=f'product_{uuid.uuid4().hex[:8]}.{extension}'))
+
+
+def render_variants(image):
+    """Return {name: (webp_bytes, width, height)} for IMAGE_VARIANTS."""
+    variants = {}
+    for name, max_edge in IMAGE_VARIANTS.items():
+        variant = _resized(image, max_edge)
+        variants[name] = (_encode(variant, 'WEBP', quality=WEBP_QUALITY, method=4), variant.width, variant.height)
+    return variants
+
+
+def save_image_variants(product, image=None):
+    """
+    Render and store the WebP variants of a product's image.
+
+    `image` is the already decoded upload; without it the stored image is
+    decoded. Content-addressed images reuse the variants of their blob, so
+    they are rendered once per distinct image. Replaces any previous variants.
+    """
+    if not product.image:
+        return
+    blob = get_blob(product.image.name)
+    if blob is not None and blob.variants:
+        variants = blob.variants
+    else:
+        if image is None:
+            with product.image.open('rb') as source:
+                image = decode_image(source)
+        rendered = render_variants(image)
+        if blob is not None:
+            variants = {
+                name: {'path': save_blob_file(blob, f'_{name}.webp', data), 'width': width, 'height': height}
+                for name, (data, width, height) in rendered.items()
+            }
+            ImageBlob.objects.filter(pk=blob.pk).update(variants=variants)
+        else:
+            stem = os.path.splitext(os.path.basename(product.image.name))[0]
+            variants = {}
+            for name, (data, width, height) in rendered.items():
+                path = default_storage.save(f'{VARIANT_DIR}/{stem}_{name}.webp', ContentFile(data))
+                variants[name] = {'path': path, 'width': width, 'height': height}
+
+    previous = product.image_variants
+    product.image_variants = variants
+    # save() so the catalog version moves and cached payloads pick up the variants
+    product.save(update_fields=['image_variants'])
+    delete_image_variants(previous)
+
+
+def delete_image_variants(variants):
+    """Delete variant files, except blob variants (collected with their blob)."""
+    for variant in (variants or {}).values():
+        if not is_blob_path(variant['path']):
+            default_storage.delete(variant['path'])
+
+
+def variant_urls(variants):
+    """{name: {'url', 'width', 'height'}} for stored variants."""
+    return {
+        name: {'url': default_storage.url(variant['path']), 'width': variant['width'], 'height': variant['height']}
+        for name, variant in (variants or {}).items()
+    }
@@ -0,0 +1,140 @@
+"""
+Cashu mint keyset cache
+
+Mint keys (`/v1/keys`) almost never change, so they are cached in the shared
+Django cache keyed by normalized mint URL:
+
+- Entries are served without contacting the mint for
+  ``MINT_KEYS_CACHE_TTL`` seconds.
+- After that the mint is revalidated with ``If-None-Match`` (when it sent an
+  ETag); a 304 just refreshes the entry.
+- Swap/melt requests whose outputs reference a keyset ID that the cached
+  entry does not know drop the entry, so a mint key rotation is picked up on
+  the next keys request.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .mint_client import get_async_mint_client, get_mint_client, normalize_mint_url
+
+MINT_KEYS_CACHE_PREFIX = 'cashu:keys:'
+MINT_KEYS_CACHE_RETAIN_SECONDS = 24 * 60 * 60  # Kept this long for revalidation
+
+
+def _cache_key(mint_url):
+    digest = hashlib.sha256(normalize_mint_url(mint_url).encode('utf-8')).hexdigest()
+    return f'{MINT_KEYS_CACHE_PREFIX}{digest}'
+
+
+def _keyset_ids(payload):
+    keysets = payload.get('keysets') if isinstance(payload, dict) else None
+    return [keyset.get('id') for keyset in keysets or [] if isinstance(keyset, dict)]
+
+
+def _payload_etag(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return '"%s"' % hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+def _revalidation_headers(entry):
+    if entry and entry.get('upstream_etag'):
+        return {'If-None-Match': entry['upstream_etag']}
+    return {}
+
+
+def _is_fresh(entry, now):
+    return entry and now - entry['fetched_at'] < getattr(settings, 'MINT_KEYS_CACHE_TTL', 300)
+
+
+def _new_entry(payload, upstream_etag, now):
+    return {
+        'keys': payload,
+        'etag': _payload_etag(payload),
+        'upstream_etag': upstream_etag,
+        'keyset_ids': _keyset_ids(payload),
+        'fetched_at': now,
+    }
+
+
+def get_mint_keys(mint_url):
+    """
+    Return the cache entry for a mint's keys, fetching or revalidating as needed.
+
+    The entry is a dict with `keys` (the mint's JSON payload), `etag` (strong
+    ETag of that payload) and `keyset_ids`. Raises requests exceptions on
+    upstream failure.
+    """
+    cache_key = _cache_key(mint_url)
+    entry = cache.get(cache_key)
+    now = time.time()
+    if _is_fresh(entry, now):
+        return entry
+
+    response = get_mint_client().get(mint_url, 'v1/keys', headers=_revalidation_headers(entry))
+    if response.status_code == 304 and entry:
+        entry['fetched_at'] = now
+    else:
+        response.raise_for_status()
+        entry = _new_entry(response.json(), response.headers.get('ETag'), now)
+    cache.set(cache_key, entry, MINT_KEYS_CACHE_RETAIN_SECONDS)
+    return entry
+
+
+async def aget_mint_keys(mint_url):
+    """Async version of get_mint_keys (raises httpx exceptions)."""
+    cache_key = _cache_key(mint_url)
+    entry = await cache.aget(cache_key)
+    now = time.time()
+    if _is_fresh(entry, now):
+        return entry
+
+    response = await get_async_mint_client().get(
+        mint_url, 'v1/keys', headers=_revalidation_headers(entry)
+    )
+    if response.status_code == 304 and entry:
+        entry['fetched_at'] = now
+    else:
+        response.raise_for_status()
+        entry = _new_entry(response.json(), response.headers.get('ETag'), now)
+    await cache.aset(cache_key, entry, MINT_KEYS_CACHE_RETAIN_SECONDS)
+    return entry
+
+
+def invalidate_mint_keys(mint_url):
+    """Drop the cached keys for a mint."""
+    cache.delete(_cache_key(mint_url))
+
+
+async def anote_keyset_ids(mint_url, keyset_ids):
+    """Async version of note_keyset_ids."""
+    keyset_ids = [keyset_id for keyset_id in keyset_ids if keyset_id]
+    if not keyset_ids:
+        return
+    entry = await cache.aget(_cache_key(mint_url))
+    if entry and any(keyset_id not in entry['keyset_ids'] for keyset_id in keyset_ids):
+        await cache.adelete(_cache_key(mint_url))
+
+
+def note_keyset_ids(mint_url, keyset_ids):
+    """
+    Invalidate a mint's cached keys if any keyset ID is not in the cache entry.
+
+    Blinded outputs must use an active keyset, so an unknown ID there means
+    the mint has rotated keys since the entry was fetched.
+    """
+    keyset_ids = [keyset_id for keyset_id in keyset_ids if keyset_id]
+    if not keyset_ids:
+        return
+    entry = cache.get(_cache_key(mint_url))
+    if entry and any(keyset_id not in entry['keyset_ids'] for keyset_id in keyset_ids):
+        invalidate_mint_keys(mint_url)
+
+
+def output_keyset_ids(outputs):
+    """Collect keyset IDs from a list of blinded messages."""
+    return [output.get('id') for output in outputs or [] if isinstance(output, dict)]
@@ -0,0 +1,315 @@
+"""
+Lightning address (LNURL-pay) invoice service
+
+Single implementation of the LNURL flow behind both
+`accounts.views.generate_lightning_invoice_view` and
+`products.views.lightning_address_quote_view`:
+
+1. payRequest metadata from `lnurl_cache` (cached per address)
+2. tag / minSendable / maxSendable / callback validation
+3. callback request for the bolt11 invoice
+
+Upstream calls share one pooled keep-alive session. Concurrent metadata
+lookups for the same address within a worker are collapsed into one
+well-known request; the callback is always requested per call, since every
+checkout needs its own bolt11 (an invoice can only be paid once). Per-domain
+latency is recorded for both requests (`get_invoice_service().metrics.snapshot()`).
+`arequest_invoice` runs the same flow for the ASGI views.
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .lnurl_cache import (
+    LnurlPayError, aget_pay_request, ainvalidate_pay_request, get_pay_request,
+    invalidate_pay_request, normalize_address
+)
+
+
+class InvoiceError(Exception):
+    """
+    Invoice request failure with the API error type and HTTP status to return
+    """
+
+    def __init__(self, message, error_type='INVALID_RESPONSE', status_code=400):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status_code = status_code
+
+
+class DomainLatencyMetrics:
+    """
+    Per-domain upstream latency counters (per worker process)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, domain, elapsed, ok):
+        with self._lock:
+            stats = self._stats.setdefault(domain, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            if not ok:
+                stats['errors'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                domain: {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['total'] / stats['count'] * 1000, 1),
+                    'max_ms': round(stats['max'] * 1000, 1),
+                }
+                for domain, stats in self._stats.items()
+            }
+
+
+class _InFlightRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LightningInvoiceService:
+    """
+    Request bolt11 invoices from Lightning addresses
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=10, pool_maxsize=10):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.pool_maxsize = pool_maxsize
+        self.metrics = DomainLatencyMetrics()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._async_client = None
+        self._async_in_flight = {}
+
+    def _get(self, url, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+            ok = response.ok
+            return response
+        finally:
+            self.metrics.record(urlsplit(url).hostname or '', time.perf_counter() - started, ok)
+
+    def request_invoice(self, address, sats, comment=None):
+        """
+        Return a new bolt11 invoice for `sats` paid to `address`.
+
+        Raises InvoiceError.
+        """
+        try:
+            return self._request_invoice(address, sats, comment)
+        except InvoiceError:
+            raise
+        except Exception as e:
+            raise InvoiceError(f'Unexpected error: {str(e)}', 'UNKNOWN', 500)
+
+    def _pay_request(self, address):
+        """
+        LNURL payRequest for address; concurrent lookups share one fetch.
+
+        Raises LnurlPayError.
+        """
+        key = normalize_address(address)
+        with self._lock:
+            flight = self._in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._in_flight[key] = _InFlightRequest()
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = get_pay_request(address, fetch=self._get)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    def _request_invoice(self, address, sats, comment):
+        milli_sats = _parse_amount(address, sats)
+
+        # Step 1: LNURL pay request details (cached per address)
+        try:
+            lnurl_data = self._pay_request(address)
+        except LnurlPayError as e:
+            raise _pay_request_error(e)
+        callback_url = _validate_pay_request(lnurl_data, sats, milli_sats)
+
+        # Step 2: Request invoice
+        try:
+            invoice_response = self._get(callback_url, params=_callback_params(milli_sats, comment))
+            invoice_response.raise_for_status()
+            invoice_data = invoice_response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # The callback may have moved; refetch metadata next time
+            invalidate_pay_request(address)
+            raise InvoiceError(f'Failed to generate invoice: {str(e)}', 'NETWORK_ERROR', 502)
+
+        return _extract_invoice(invoice_data)
+
+    # ASGI mode (products.async_views): same flow on an httpx client owned
+    # by the worker's event loop, with metadata dedup through futures
+
+    async def _aget(self, url, **kwargs):
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_keepalive_connections=self.pool_maxsize),
+            )
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = await self._async_client.get(url, **kwargs)
+            ok = response.is_success
+            return response
+        finally:
+            self.metrics.record(urlsplit(url).hostname or '', time.perf_counter() - started, ok)
+
+    async def arequest_invoice(self, address, sats, comment=None):
+        """Async version of request_invoice."""
+        try:
+            return await self._arequest_invoice(address, sats, comment)
+        except InvoiceError:
+            raise
+        except Exception as e:
+            raise InvoiceError(f'Unexpected error: {str(e)}', 'UNKNOWN', 500)
+
+    async def _apay_request(self, address):
+        """Async version of _pay_request."""
+        key = normalize_address(address)
+        future = self._async_in_flight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_in_flight[key] = future
+        try:
+            lnurl_data = await aget_pay_request(address, fetch=self._aget)
+            future.set_result(lnurl_data)
+            return lnurl_data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._async_in_flight.pop(key, None)
+            if not future.done():
+                # Leader was cancelled (client went away); release waiters
+                future.set_exception(LnurlPayError('Lightning address lookup was cancelled', 'NETWORK_ERROR'))
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+
+    async def _arequest_invoice(self, address, sats, comment):
+        milli_sats = _parse_amount(address, sats)
+
+        try:
+            lnurl_data = await self._apay_request(address)
+        except LnurlPayError as e:
+            raise _pay_request_error(e)
+        callback_url = _validate_pay_request(lnurl_data, sats, milli_sats)
+
+        try:
+            invoice_response = await self._aget(callback_url, params=_callback_params(milli_sats, comment))
+            invoice_response.raise_for_status()
+            invoice_data = invoice_response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            await ainvalidate_pay_request(address)
+            raise InvoiceError(f'Failed to generate invoice: {str(e)}', 'NETWORK_ERROR', 502)
+
+        return _extract_invoice(invoice_data)
+
+
+def _parse_amount(address, sats):
+    if not address or '@' not in address:
+        raise InvoiceError('Invalid Lightning address format', 'INVALID_REQUEST')
+    try:
+        return int(sats) * 1000
+    except (TypeError, ValueError):
+        raise InvoiceError('Amount must be an integer number of sats', 'INVALID_REQUEST')
+
+
+def _pay_request_error(error):
+    if error.error_type == 'NETWORK_ERROR':
+        return InvoiceError(f'Failed to connect to Lightning service: {str(error)}', 'NETWORK_ERROR', 502)
+    return InvoiceError(str(error), error.error_type)
+
+
+def _validate_pay_request(lnurl_data, sats, milli_sats):
+    """Check the payRequest against the amount and return its callback URL."""
+    if lnurl_data.get('tag') != 'payRequest':
+        raise InvoiceError('Invalid LNURL response: missing payRequest tag', 'INVALID_RESPONSE')
+
+    min_sendable = lnurl_data.get('minSendable', 0)
+    max_sendable = lnurl_data.get('maxSendable', 0)
+    if milli_sats < min_sendable or milli_sats > max_sendable:
+        raise InvoiceError(
+            f'Amount {sats} sats is outside allowed range ({min_sendable // 1000} - {max_sendable // 1000} sats)',
+            'INVALID_AMOUNT'
+        )
+
+    callback_url = lnurl_data.get('callback')
+    if not callback_url:
+        raise InvoiceError('No callback URL in LNURL response', 'INVALID_RESPONSE')
+    return callback_url
+
+
+def _callback_params(milli_sats, comment):
+    params = {'amount': milli_sats}
+    if comment:
+        params['comment'] = comment
+    return params
+
+
+def _extract_invoice(invoice_data):
+    if invoice_data.get('status') == 'ERROR':
+        raise InvoiceError(invoice_data.get('reason', 'Failed to generate invoice'), 'INVALID_RESPONSE')
+
+    invoice = invoice_data.get('pr')
+    if not invoice:
+        raise InvoiceError('No invoice returned from Lightning service', 'INVALID_RESPONSE')
+    return invoice
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_invoice_service():
+    """Return the process-wide invoice service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = LightningInvoiceService(
+                    connect_timeout=getattr(settings, 'LIGHTNING_HTTP_CONNECT_TIMEOUT', 5),
+                    read_timeout=getattr(settings, 'LIGHTNING_HTTP_READ_TIMEOUT', 10),
+                    pool_maxsize=getattr(settings, 'LIGHTNING_HTTP_POOL_MAXSIZE', 10),
+                )
+    return _service
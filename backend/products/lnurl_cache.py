@@ -0,0 +1,143 @@
+"""
+LNURL-pay metadata cache for Lightning addresses
+
+Merchant Lightning addresses rarely change, so the payRequest returned by
+`https://<domain>/.well-known/lnurlp/<user>` is cached per address in the
+shared Django cache. Getting an invoice then only needs the callback
+round trip.
+
+Failures (network errors, HTTP errors and `status: ERROR` replies) are
+cached for a shorter time so a broken address does not hammer its service.
+"""
+
+import hashlib
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+LNURL_CACHE_PREFIX = 'lnurlp:'
+# payRequest fields needed to request and validate an invoice
+LNURL_PAY_REQUEST_FIELDS = ('tag', 'callback', 'minSendable', 'maxSendable', 'commentAllowed', 'metadata')
+
+
+class LnurlPayError(Exception):
+    """
+    LNURL payRequest lookup failure
+
+    error_type is one of NETWORK_ERROR, WALLET_NOT_FOUND or INVALID_RESPONSE.
+    """
+
+    def __init__(self, message, error_type='INVALID_RESPONSE'):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def normalize_address(address):
+    return (address or '').strip().lower()
+
+
+def _cache_key(address):
+    digest = hashlib.sha256(normalize_address(address).encode('utf-8')).hexdigest()
+    return f'{LNURL_CACHE_PREFIX}{digest}'
+
+
+def lnurlp_endpoint(address):
+    """Return the LNURL-pay well-known URL for user@domain."""
+    name, domain = normalize_address(address).split('@', 1)
+    return f'https://{domain}/.well-known/lnurlp/{name}'
+
+
+def _parse_pay_request(lnurl_data):
+    if not isinstance(lnurl_data, dict):
+        raise LnurlPayError('Invalid LNURL response', 'INVALID_RESPONSE')
+
+    if lnurl_data.get('status') == 'ERROR':
+        error_reason = lnurl_data.get('reason', 'Unknown error')
+        error_type = 'WALLET_NOT_FOUND' if 'wallet' in error_reason.lower() else 'INVALID_RESPONSE'
+        raise LnurlPayError(error_reason, error_type)
+
+    return {field: lnurl_data[field] for field in LNURL_PAY_REQUEST_FIELDS if field in lnurl_data}
+
+
+def _fetch_pay_request(address, fetch):
+    try:
+        response = fetch(lnurlp_endpoint(address))
+        response.raise_for_status()
+        lnurl_data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise LnurlPayError(str(e), 'NETWORK_ERROR')
+    return _parse_pay_request(lnurl_data)
+
+
+async def _afetch_pay_request(address, fetch):
+    try:
+        response = await fetch(lnurlp_endpoint(address))
+        response.raise_for_status()
+        lnurl_data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise LnurlPayError(str(e), 'NETWORK_ERROR')
+    return _parse_pay_request(lnurl_data)
+
+
+def _success_entry(data):
+    return {'data': data}, getattr(settings, 'LNURL_CACHE_TTL', 600)
+
+
+def _error_entry(error):
+    entry = {'error': str(error), 'error_type': error.error_type}
+    return entry, getattr(settings, 'LNURL_NEGATIVE_CACHE_TTL', 30)
+
+
+def _entry_data(entry):
+    if 'error' in entry:
+        raise LnurlPayError(entry['error'], entry['error_type'])
+    return entry['data']
+
+
+def _requests_get(url):
+    return requests.get(url, timeout=10)
+
+
+def get_pay_request(address, fetch=None):
+    """
+    Return cached LNURL payRequest metadata for a Lightning address.
+
+    `fetch(url)` performs the HTTP GET on a cache miss (plain requests.get
+    with a 10s timeout by default). Raises LnurlPayError (also for cached
+    failures).
+    """
+    if fetch is None:
+        fetch = _requests_get
+    cache_key = _cache_key(address)
+    entry = cache.get(cache_key)
+    if entry is None:
+        try:
+            entry, ttl = _success_entry(_fetch_pay_request(address, fetch))
+        except LnurlPayError as e:
+            entry, ttl = _error_entry(e)
+        cache.set(cache_key, entry, ttl)
+    return _entry_data(entry)
+
+
+async def aget_pay_request(address, fetch):
+    """Async version of get_pay_request; `fetch(url)` must be a coroutine."""
+    cache_key = _cache_key(address)
+    entry = await cache.aget(cache_key)
+    if entry is None:
+        try:
+            entry, ttl = _success_entry(await _afetch_pay_request(address, fetch))
+        except LnurlPayError as e:
+            entry, ttl = _error_entry(e)
+        await cache.aset(cache_key, entry, ttl)
+    return _entry_data(entry)
+
+
+def invalidate_pay_request(address):
+    """Drop cached metadata, e.g. after its callback stopped working."""
+    cache.delete(_cache_key(address))
+
+
+async def ainvalidate_pay_request(address):
+    await cache.adelete(_cache_key(address))
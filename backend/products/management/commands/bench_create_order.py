@@ -0,0 +1,101 @@
+"""
+Benchmark order creation against cart size
+
+    python manage.py bench_create_order
+    python manage.py bench_create_order --sizes 1,10,100 --repeat 50
+
+Compares the previous per-item loop (OrderItem.objects.create for each cart
+line, lazy product loads) with products.orders.create_order_from_cart.
+Everything runs inside a transaction that is rolled back afterwards.
+"""
+
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.crypto import get_random_string
+
+from products.models import CartItem, Order, OrderItem, Product
+from products.orders import create_order_from_cart
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _per_item_loop(user, payment_method):
+    # Order creation as it was before the bulk pipeline
+    cart_items = CartItem.objects.filter(user=user)
+    with transaction.atomic():
+        subtotal = sum(item.total_price for item in cart_items)
+        order = Order.objects.create(
+            user=user,
+            order_number=get_random_string(10).upper(),
+            payment_method=payment_method,
+            subtotal=subtotal,
+            total_amount=subtotal,
+            status='pending'
+        )
+        for cart_item in cart_items:
+            OrderItem.objects.create(
+                order=order,
+                product=cart_item.product,
+                quantity=cart_item.quantity,
+                unit_price=cart_item.product.price,
+                total_price=cart_item.total_price
+            )
+        cart_items.delete()
+    return order
+
+
+class Command(BaseCommand):
+    help = '장바구니 크기별 주문 생성 벤치마크'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,100')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of integers')
+
+        self.stdout.write(f"repeat={options['repeat']}")
+        self.stdout.write(
+            f"{'cart lines':>10} {'pipeline':>10} {'ms':>8} {'queries':>8}"
+        )
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    username=f'bench_{get_random_string(8)}', password=get_random_string(16)
+                )
+                for size in sizes:
+                    products = Product.objects.bulk_create([
+                        Product(name=f'bench {size}-{i}', price=Decimal('1000'),
+                                stock_quantity=10 ** 6, created_by=user)
+                        for i in range(size)
+                    ])
+                    for label, create in (('loop', _per_item_loop), ('bulk', create_order_from_cart)):
+                        elapsed, queries = self._measure(user, products, create, options['repeat'])
+                        self.stdout.write(f'{size:>10} {label:>10} {elapsed:>8.2f} {queries:>8}')
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _measure(self, user, products, create, repeat):
+        total = 0.0
+        queries = 0
+        for _ in range(repeat):
+            CartItem.objects.bulk_create([
+                CartItem(user=user, product=product, quantity=2) for product in products
+            ])
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                create(user, 'cash')
+                total += time.perf_counter() - started
+            queries = len(captured)
+        return total / repeat * 1000, queries
@@ -0,0 +1,96 @@
+"""
+Benchmark orphaned media collection on a synthetic media tree
+
+    python manage.py bench_media_gc
+    python manage.py bench_media_gc --files 100000 --referenced 0.5
+
+Creates --files small files in a temporary MEDIA_ROOT (spread over 256
+directories like the blob store), points products at a --referenced share
+of them inside a transaction that is rolled back afterwards, then times a
+dry run and a real run of collect_orphan_media.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products.media_gc import DEFAULT_BATCH_SIZE, collect_orphan_media
+from products.models import Product
+
+OLD_MTIME = time.time() - 7 * 24 * 60 * 60
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '고아 미디어 파일 정리 처리량 벤치마크'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=100_000)
+        parser.add_argument('--referenced', type=float, default=0.5, help='Share of files used by products')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['referenced'] <= 1:
+            raise CommandError('--referenced must be between 0 and 1')
+
+        root = tempfile.mkdtemp(prefix='bench_media_gc_')
+        try:
+            names = self._make_files(root, options['files'])
+            try:
+                with transaction.atomic():
+                    self._run(root, names, options)
+                    raise _Rollback()
+            except _Rollback:
+                pass
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _make_files(self, root, count):
+        started = time.perf_counter()
+        names = []
+        for index in range(count):
+            name = f'products/cas/{index % 256:02x}/{index:064x}.jpg'
+            path = os.path.join(root, name)
+            if index < 256:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as handle:
+                handle.write(b'x')
+            os.utime(path, (OLD_MTIME, OLD_MTIME))
+            names.append(name)
+        self.stdout.write(f'created {count} files in {time.perf_counter() - started:.1f}s')
+        return names
+
+    def _run(self, root, names, options):
+        referenced = names[:int(len(names) * options['referenced'])]
+        Product.objects.bulk_create(
+            [Product(name='bench', price=1, image=name) for name in referenced], batch_size=1000
+        )
+        expected_orphans = len(names) - len(referenced)
+
+        # Memory is measured in a separate pass; tracing slows the timed runs down
+        tracemalloc.start()
+        collect_orphan_media(root=root, batch_size=options['batch_size'], dry_run=True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(f'peak Python memory (dry run): {peak / 1024 / 1024:.1f} MiB')
+
+        for dry_run in (True, False):
+            started = time.perf_counter()
+            stats = collect_orphan_media(root=root, batch_size=options['batch_size'], dry_run=dry_run)
+            elapsed = time.perf_counter() - started
+
+            if stats['orphans'] != expected_orphans:
+                raise CommandError(f"expected {expected_orphans} orphans, found {stats['orphans']}")
+            label = 'dry run' if dry_run else 'delete'
+            self.stdout.write(
+                f"{label:>8}: {stats['scanned']} files, {stats['orphans']} orphans, "
+                f"{stats['deleted']} deleted in {elapsed:.2f}s ({stats['scanned'] / elapsed:,.0f} files/s)"
+            )
@@ -0,0 +1,128 @@
+"""
+Benchmark NUT-18 payment request polling and expiry against the number of open requests
+
+    python manage.py bench_payment_requests --backend memory
+    python manage.py bench_payment_requests --backend database --sizes 10,1000,10000
+
+For each size, the store is filled with that many long-lived requests and
+then measured twice:
+
+- poll: the payment request view asked for a missing ID
+- expiry: --rounds rounds of --batch requests stored with a --ttl second
+  TTL (time per `set`), left to expire, then swept with `cleanup()` (time
+  per expired request). Flat numbers across sizes show that expiry only
+  touches expired entries. The redis backend expires keys server-side, so
+  its cleanup is a no-op.
+
+Database runs happen inside a transaction that is rolled back afterwards.
+"""
+
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from products import payment_store
+from products.views import nut18_payment_request_view
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'NUT-18 결제 요청 폴링 지연 시간 벤치마크'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default='memory', choices=['memory', 'database', 'redis'])
+        parser.add_argument('--sizes', default='10,100,1000,10000,100000')
+        parser.add_argument('--polls', type=int, default=2000)
+        parser.add_argument('--rounds', type=int, default=20, help='Expiry rounds per size')
+        parser.add_argument('--batch', type=int, default=500, help='Short-lived requests per round')
+        parser.add_argument('--ttl', type=float, default=0.05, help='TTL (s) of the short-lived requests')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of integers')
+
+        self.stdout.write(
+            f"backend={options['backend']} polls={options['polls']} "
+            f"expiry={options['rounds']}x{options['batch']} ttl={options['ttl']}s"
+        )
+        self.stdout.write(
+            f"{'open requests':>14} {'poll mean':>10} {'poll p99':>10} "
+            f"{'set':>10} {'cleanup/req':>12}   (us)"
+        )
+
+        for size in sizes:
+            if options['backend'] == 'database':
+                try:
+                    with transaction.atomic():
+                        self._run(size, options)
+                        raise _Rollback()
+                except _Rollback:
+                    pass
+            else:
+                self._run(size, options)
+
+    def _run(self, size, options):
+        store = payment_store.create_payment_request_store(options['backend'])
+        original_store = payment_store._store
+        payment_store._store = store
+        try:
+            if options['backend'] == 'database':
+                self._fill_database(size)
+            else:
+                for _ in range(size):
+                    store.set(uuid.uuid4().hex, {'proofs': [], 'amount': 0})
+
+            factory = RequestFactory()
+            request = factory.get('/api/products/payments/requests/missing/')
+            samples = []
+            for _ in range(options['polls']):
+                started = time.perf_counter()
+                nut18_payment_request_view(request, payment_id='missing')
+                samples.append(time.perf_counter() - started)
+
+            set_us, cleanup_us = self._expire(store, options)
+        finally:
+            payment_store._store = original_store
+
+        samples.sort()
+        mean_us = sum(samples) / len(samples) * 1e6
+        p99_us = samples[int(len(samples) * 0.99) - 1] * 1e6
+        self.stdout.write(f'{size:>14} {mean_us:>10.1f} {p99_us:>10.1f} {set_us:>10.1f} {cleanup_us:>12.2f}')
+
+    def _expire(self, store, options):
+        """Mean us per short-lived set and per expired request swept."""
+        # Only the requests stored from here on get the short TTL
+        store.ttl_seconds = options['ttl']
+        set_time = cleanup_time = 0.0
+        for _ in range(options['rounds']):
+            started = time.perf_counter()
+            for _ in range(options['batch']):
+                store.set(uuid.uuid4().hex, {'proofs': [], 'amount': 0})
+            set_time += time.perf_counter() - started
+
+            time.sleep(options['ttl'] * 1.5)
+            started = time.perf_counter()
+            store.cleanup()
+            cleanup_time += time.perf_counter() - started
+
+        total = options['rounds'] * options['batch']
+        return set_time / total * 1e6, cleanup_time / total * 1e6
+
+    def _fill_database(self, size):
+        from products.models import PaymentRequest
+        # Dated ahead so they stay live when the expiry phase shortens the TTL
+        created_at = timezone.now() + timedelta(days=1)
+        PaymentRequest.objects.bulk_create(
+            [PaymentRequest(payment_id=uuid.uuid4().hex, payload={}, created_at=created_at) for _ in range(size)],
+            batch_size=1000
+        )
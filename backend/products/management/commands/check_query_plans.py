@@ -0,0 +1,78 @@
+"""
+Check that the hot catalog, cart, order and task queue queries use an index (SQLite)
+
+    python manage.py check_query_plans
+
+Runs EXPLAIN QUERY PLAN for each query and exits with an error if one of
+them scans its table or sorts in a temporary B-tree instead of reading an
+index in order. `products.tests.QueryPlanTests` runs the same checks under
+`manage.py test`; this command shows the plans against a live database.
+"""
+
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from products.cart import cart_items
+from products.models import BackgroundTask, CartItem, Order, Product
+
+# Any real ID works; the plan does not depend on the value
+SAMPLE_ID = 1
+
+
+def hot_queries():
+    now = timezone.now()
+    available = Product.objects.filter(created_by=SAMPLE_ID, is_available=True)
+    orders = Order.objects.filter(user=SAMPLE_ID).order_by('-created_at', '-id')
+    return [
+        ('available products', available.order_by('-created_at')),
+        ('available products by category', available.filter(category_id=SAMPLE_ID).order_by('-created_at')),
+        ('order list page', orders[:21]),
+        ('order list date range', orders.filter(created_at__gte=now - timedelta(days=30), created_at__lte=now)[:21]),
+        ('cart lines', cart_items(SAMPLE_ID)),
+        ('carts holding a product', CartItem.objects.filter(product_id=SAMPLE_ID).values_list('user_id', flat=True)),
+        ('due background tasks', BackgroundTask.objects.filter(status='queued', run_at__lte=now).order_by('run_at')[:10]),
+        ('expired task leases', BackgroundTask.objects.filter(status='running', locked_until__lt=now).order_by('locked_until')[:10]),
+    ]
+
+
+def query_plan(queryset):
+    """EXPLAIN QUERY PLAN detail lines for a queryset."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, table):
+    problems = []
+    for detail in plan:
+        if re.match(rf'SCAN {table}\b(?! USING (COVERING )?INDEX)', detail):
+            problems.append(f'full table scan: {detail}')
+        elif 'USE TEMP B-TREE FOR ORDER BY' in detail:
+            problems.append(f'sort without index: {detail}')
+    return problems
+
+
+class Command(BaseCommand):
+    help = '주요 상품/장바구니/주문 쿼리의 실행 계획(인덱스 사용) 확인'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('check_query_plans only supports SQLite (EXPLAIN QUERY PLAN)')
+
+        failures = 0
+        for label, queryset in hot_queries():
+            plan = query_plan(queryset)
+            problems = plan_problems(plan, queryset.model._meta.db_table)
+            status = self.style.ERROR('FAIL') if problems else self.style.SUCCESS('ok')
+            self.stdout.write(f'{status:<4} {label}: {" | ".join(plan)}')
+            for problem in problems:
+                self.stdout.write(f'     {problem}')
+            failures += bool(problems)
+
+        if failures:
+            raise CommandError(f'{failures} hot queries do not use an index')
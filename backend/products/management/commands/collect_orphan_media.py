@@ -0,0 +1,54 @@
+"""
+Delete media files that no product or image blob refers to
+
+    python manage.py collect_orphan_media --dry-run
+    python manage.py collect_orphan_media --batch-size 500 --min-age 3600
+
+Streams MEDIA_ROOT/products and the database (see products.media_gc) and
+deletes orphans batch by batch. Files younger than --min-age seconds are
+kept. Safe to run from cron while the server is up.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.media_gc import (
+    DEFAULT_BATCH_SIZE, DEFAULT_MEDIA_SUBDIR, DEFAULT_MIN_AGE_SECONDS, collect_orphan_media,
+)
+
+
+class Command(BaseCommand):
+    help = '상품/이미지 파일이 참조하지 않는 미디어 파일 정리'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report orphans')
+        parser.add_argument('--path', default=DEFAULT_MEDIA_SUBDIR, help='Directory under MEDIA_ROOT to scan')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--min-age', type=int, default=DEFAULT_MIN_AGE_SECONDS,
+                            help='Keep files modified within this many seconds')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        verbose = options['verbosity'] > 1
+
+        def report(names, stats):
+            if verbose:
+                for name in names:
+                    self.stdout.write(f'orphan: {name}')
+
+        try:
+            stats = collect_orphan_media(
+                subdir=options['path'],
+                batch_size=options['batch_size'],
+                min_age_seconds=options['min_age'],
+                dry_run=options['dry_run'],
+                on_batch=report,
+            )
+        except ValueError as e:
+            raise CommandError(f'--path must be under MEDIA_ROOT: {e}')
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{stats['scanned']} files scanned, {stats['orphans']} orphans "
+            f"({stats['orphan_bytes']} bytes), {stats['deleted']} deleted, "
+            f"{stats['skipped_recent']} recent files kept"
+        ))
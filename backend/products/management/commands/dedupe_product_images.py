@@ -0,0 +1,83 @@
+"""
+Move product images stored before content addressing into the blob store
+
+    python manage.py dedupe_product_images --dry-run
+    python manage.py dedupe_product_images
+
+Products whose image is still a ``products/product_<uuid>.<ext>`` file are
+pointed at the blob with the same content, and their variants are queued
+again (rendered once per distinct image). Old files that no product uses
+anymore are deleted at the end.
+"""
+
+import hashlib
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from products.blobs import BLOB_DIR, store_blob
+from products.images import delete_image_variants
+from products.models import Product
+from products.task_queue import enqueue
+
+
+class Command(BaseCommand):
+    help = '기존 상품 이미지를 내용 주소(SHA-256) 저장소로 이동하고 중복 파일 정리'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        legacy = (
+            Product.objects.exclude(image='').exclude(image__isnull=True)
+            .exclude(image__startswith=f'{BLOB_DIR}/').only('id', 'image', 'image_variants', 'created_by')
+        )
+
+        moved = missing = total_bytes = 0
+        content_keys = {}
+        old_names = set()
+        for product in legacy.iterator():
+            name = product.image.name
+            if not default_storage.exists(name):
+                missing += 1
+                self.stdout.write(f'missing file for product {product.id}: {name}')
+                continue
+
+            with default_storage.open(name, 'rb') as source:
+                if dry_run:
+                    hasher = hashlib.sha256()
+                    for chunk in File(source).chunks():
+                        hasher.update(chunk)
+                    content_key = hasher.hexdigest()
+                else:
+                    content_key = store_blob(File(source, name=name))
+            size = default_storage.size(name)
+            total_bytes += size
+            content_keys.setdefault(content_key, size)
+            old_names.add(name)
+            moved += 1
+            if dry_run:
+                continue
+
+            previous_variants = product.image_variants
+            product.image = content_key
+            product.image_variants = {}
+            product.save(update_fields=['image', 'image_variants'])
+            delete_image_variants(previous_variants)
+            enqueue('products.generate_image_variants', {'product_id': product.id, 'image': content_key})
+
+        deleted = 0
+        if not dry_run:
+            for name in old_names:
+                if not Product.objects.filter(image=name).exists():
+                    default_storage.delete(name)
+                    deleted += 1
+
+        unique_bytes = sum(content_keys.values())
+        prefix = '[dry-run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{moved} products, {len(content_keys)} distinct images, '
+            f'{total_bytes - unique_bytes} bytes duplicated, {deleted} old files deleted, {missing} missing'
+        ))
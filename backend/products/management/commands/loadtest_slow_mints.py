@@ -0,0 +1,126 @@
+"""
+Load test: cart throughput while Cashu mints are slow
+
+Starts a local stand-in mint whose /v1/swap answers after --mint-delay
+seconds, keeps --slow-clients swap requests in flight against it through
+the running server, and measures cart GET throughput at the same time.
+Run it against the WSGI and ASGI servers to compare:
+
+    gunicorn --workers 3 --bind 127.0.0.1:8001 kiosk_backend.wsgi:application
+    gunicorn -k uvicorn.workers.UvicornWorker --workers 3 --bind 127.0.0.1:8001 kiosk_backend.asgi:application
+    python manage.py loadtest_slow_mints --base-url http://127.0.0.1:8001
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+
+def _slow_mint_handler(delay):
+    class SlowMintHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            time.sleep(delay)
+            body = b'{"signatures": []}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return SlowMintHandler
+
+
+class Command(BaseCommand):
+    help = '느린 민트 환경에서 장바구니 처리량 부하 테스트'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8001')
+        parser.add_argument('--mint-delay', type=float, default=5.0)
+        parser.add_argument('--slow-clients', type=int, default=6)
+        parser.add_argument('--cart-clients', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        mint = ThreadingHTTPServer(('127.0.0.1', 0), _slow_mint_handler(options['mint_delay']))
+        mint.daemon_threads = True
+        threading.Thread(target=mint.serve_forever, daemon=True).start()
+        mint_url = f'http://127.0.0.1:{mint.server_port}'
+        base_url = options['base_url'].rstrip('/')
+
+        try:
+            baseline = self._measure_cart(base_url, options, slow_clients=0, mint_url=mint_url)
+            loaded = self._measure_cart(base_url, options, options['slow_clients'], mint_url)
+        finally:
+            mint.shutdown()
+
+        self.stdout.write(f"{'scenario':<24} {'cart req/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errors':>7}")
+        for label, result in (('no slow mint calls', baseline),
+                              (f"{options['slow_clients']} slow mint calls", loaded)):
+            self.stdout.write(
+                f"{label:<24} {result['rps']:>10.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} {result['errors']:>7}"
+            )
+
+    def _measure_cart(self, base_url, options, slow_clients, mint_url):
+        stop = threading.Event()
+        latencies = []
+        errors = []
+
+        def slow_client():
+            session = requests.Session()
+            while not stop.is_set():
+                try:
+                    session.post(f'{base_url}/api/cashu/swap/', json={
+                        'mintUrl': mint_url, 'inputs': [{'amount': 1}], 'outputs': [{'amount': 1}]
+                    }, timeout=options['mint_delay'] + 30)
+                except requests.exceptions.RequestException:
+                    pass
+
+        def cart_client():
+            session = requests.Session()
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    response = session.get(f'{base_url}/api/products/cart/', timeout=30)
+                    if response.ok:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors.append(response.status_code)
+                except requests.exceptions.RequestException as e:
+                    errors.append(str(e))
+
+        slow_threads = [threading.Thread(target=slow_client, daemon=True) for _ in range(slow_clients)]
+        for thread in slow_threads:
+            thread.start()
+        if slow_clients:
+            time.sleep(0.5)  # Let the slow calls occupy the server first
+
+        cart_threads = [threading.Thread(target=cart_client, daemon=True) for _ in range(options['cart_clients'])]
+        started = time.perf_counter()
+        for thread in cart_threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        elapsed = time.perf_counter() - started
+        for thread in cart_threads:
+            thread.join()
+
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'errors': len(errors),
+        }
@@ -0,0 +1,64 @@
+"""
+Run the background task worker (see products.task_queue)
+
+    python manage.py run_task_worker
+    python manage.py run_task_worker --once     # drain due tasks and exit
+
+Several workers can run side by side; each claims its own tasks. Stops
+after the current task on SIGINT/SIGTERM.
+"""
+
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from products.task_queue import claim_tasks, run_task, schedule_periodic_tasks
+
+
+class Command(BaseCommand):
+    help = '백그라운드 작업 워커 실행 (이미지 변형 생성, 만료 데이터 정리 등)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run due tasks once and exit')
+        parser.add_argument('--batch', type=int, default=10, help='Tasks claimed per poll')
+        parser.add_argument('--poll', type=float, default=None,
+                            help='Seconds to sleep when the queue is empty (TASK_WORKER_POLL_SECONDS)')
+        parser.add_argument('--visibility-timeout', type=int, default=None,
+                            help='Seconds a claimed task is hidden from other workers (TASK_VISIBILITY_TIMEOUT)')
+
+    def handle(self, *args, **options):
+        poll = options['poll'] or getattr(settings, 'TASK_WORKER_POLL_SECONDS', 1.0)
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = False
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._stop)
+
+        self.stdout.write(f'Task worker {worker_id} started')
+        succeeded = failed = 0
+        while not self._stopping:
+            close_old_connections()
+            schedule_periodic_tasks()
+            tasks = claim_tasks(worker_id, options['batch'], options['visibility_timeout'])
+            for task in tasks:
+                if self._stopping:
+                    # Unstarted tasks are picked up again after their lease expires
+                    break
+                if run_task(task):
+                    succeeded += 1
+                else:
+                    failed += 1
+
+            if options['once'] and not tasks:
+                break
+            if not tasks:
+                time.sleep(poll)
+
+        self.stdout.write(f'Task worker {worker_id} stopped ({succeeded} succeeded, {failed} failed)')
+
+    def _stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,135 @@
+"""
+Orphaned media collection
+
+Files under MEDIA_ROOT that no product or image blob refers to (e.g. the
+image of a product deleted before content addressing, or replaced
+uploads) are never removed by the request path. `collect_orphan_media`
+finds and deletes them without loading either side in full:
+
+1. The referenced names are streamed from the database into one set
+   (`Product.image`, product variants, `ImageBlob` paths and variants).
+2. The media directory is walked lazily with os.scandir and compared with
+   that set in batches; only the current batch of orphans is kept.
+3. Before a batch is deleted, its names are checked against the database
+   again, and files younger than `min_age_seconds` are always kept, so
+   uploads that are not saved on a product yet survive.
+
+Used by ``manage.py collect_orphan_media``.
+"""
+
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+
+from .models import ImageBlob, Product
+
+DEFAULT_MEDIA_SUBDIR = 'products'
+DEFAULT_BATCH_SIZE = 500  # Stays below SQLite's bound parameter limit for the re-check
+DEFAULT_MIN_AGE_SECONDS = 60 * 60
+QUERY_CHUNK_SIZE = 2000
+
+
+def referenced_media_names():
+    """Set of media names (relative to MEDIA_ROOT) the database refers to."""
+    names = set()
+    products = Product.objects.exclude(image='').exclude(image__isnull=True)
+    for image, variants in products.values_list('image', 'image_variants').iterator(chunk_size=QUERY_CHUNK_SIZE):
+        names.add(image)
+        names.update(variant['path'] for variant in (variants or {}).values())
+    for path, variants in ImageBlob.objects.values_list('path', 'variants').iterator(chunk_size=QUERY_CHUNK_SIZE):
+        names.add(path)
+        names.update(variant['path'] for variant in (variants or {}).values())
+    return names
+
+
+def media_subdir(root, subdir):
+    """
+    Return subdir normalized relative to root (symlinks resolved).
+
+    Raises ValueError if it points outside root (absolute paths, '..').
+    """
+    root = os.path.realpath(root)
+    directory = os.path.realpath(os.path.join(root, subdir))
+    if os.path.commonpath([root, directory]) != root:
+        raise ValueError(f'{subdir!r} is not under {root}')
+    return os.path.relpath(directory, root)
+
+
+def iter_media_files(root, subdir=DEFAULT_MEDIA_SUBDIR):
+    """Yield (name, size, mtime) for each file under root/subdir, names relative to root."""
+    pending = [os.path.join(root, subdir)]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    yield name, stat.st_size, stat.st_mtime
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _still_referenced(names):
+    return (
+        set(Product.objects.filter(image__in=names).values_list('image', flat=True))
+        | set(ImageBlob.objects.filter(path__in=names).values_list('path', flat=True))
+    )
+
+
+def collect_orphan_media(root=None, subdir=DEFAULT_MEDIA_SUBDIR, batch_size=DEFAULT_BATCH_SIZE,
+                         min_age_seconds=DEFAULT_MIN_AGE_SECONDS, dry_run=False, on_batch=None):
+    """
+    Delete (or with dry_run, only report) unreferenced files under root/subdir.
+
+    `on_batch(names, stats)` is called with each batch of orphans. Returns
+    stats: scanned, orphans, deleted, orphan_bytes, skipped_recent. Raises
+    ValueError if subdir is not under root.
+    """
+    root = os.path.realpath(root or settings.MEDIA_ROOT)
+    subdir = media_subdir(root, subdir)
+    referenced = referenced_media_names()
+    cutoff = time.time() - min_age_seconds
+    stats = {'scanned': 0, 'orphans': 0, 'deleted': 0, 'orphan_bytes': 0, 'skipped_recent': 0}
+
+    for batch in _batches(iter_media_files(root, subdir), batch_size):
+        stats['scanned'] += len(batch)
+        candidates = {}
+        for name, size, mtime in batch:
+            if name in referenced:
+                continue
+            if mtime > cutoff:
+                stats['skipped_recent'] += 1
+                continue
+            candidates[name] = size
+        if not candidates:
+            continue
+
+        # Referenced after the set was built (e.g. dedupe_product_images ran meanwhile)
+        for name in _still_referenced(list(candidates)):
+            del candidates[name]
+        stats['orphans'] += len(candidates)
+        stats['orphan_bytes'] += sum(candidates.values())
+        if on_batch:
+            on_batch(sorted(candidates), stats)
+        if dry_run:
+            continue
+        for name in candidates:
+            try:
+                os.remove(os.path.join(root, name))
+                stats['deleted'] += 1
+            except FileNotFoundError:
+                pass
+    return stats
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_payment_request'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='custom_name',
+            field=models.CharField(blank=True, max_length=200, verbose_name='커스텀 상품명'),
+        ),
+        migrations.AddField(
+            model_name='cartitem',
+            name='custom_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='커스텀 금액'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='custom_name',
+            field=models.CharField(blank=True, max_length=200, verbose_name='커스텀 상품명'),
+        ),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.product', verbose_name='상품'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.product', verbose_name='상품'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+CUSTOM_ITEM_IMAGE_FLAG = 'custom_item'
+
+
+def move_custom_item_products(apps, schema_editor):
+    """커스텀 금액 상품(image_url='custom_item')을 장바구니/주문 아이템으로 옮기고 상품 테이블에서 삭제"""
+    Product = apps.get_model('products', 'Product')
+    CartItem = apps.get_model('products', 'CartItem')
+    OrderItem = apps.get_model('products', 'OrderItem')
+
+    custom_products = Product.objects.filter(image_url=CUSTOM_ITEM_IMAGE_FLAG)
+    product_name = Subquery(custom_products.filter(pk=OuterRef('product_id')).values('name')[:1])
+    product_price = Subquery(custom_products.filter(pk=OuterRef('product_id')).values('price')[:1])
+
+    # Copy name/price onto the line items first, then detach them
+    order_items = OrderItem.objects.filter(product__image_url=CUSTOM_ITEM_IMAGE_FLAG)
+    order_items.update(custom_name=product_name)
+    moved_order_items = order_items.update(product=None)
+
+    cart_items = CartItem.objects.filter(product__image_url=CUSTOM_ITEM_IMAGE_FLAG)
+    cart_items.update(custom_name=product_name, custom_price=product_price)
+    moved_cart_items = cart_items.update(product=None)
+
+    deleted, _ = custom_products.delete()
+    if deleted:
+        print(f"커스텀 상품 {deleted}개 삭제 (주문 아이템 {moved_order_items}개, 장바구니 아이템 {moved_cart_items}개 이전)")
+
+
+def reverse_move_custom_item_products(apps, schema_editor):
+    """역작업 - 커스텀 아이템은 상품 없이 유지"""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_custom_line_items'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_custom_item_products, reverse_move_custom_item_products),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0010_catalog_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='버전')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('merchant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_version', to=settings.AUTH_USER_MODEL, verbose_name='판매자')),
+            ],
+            options={
+                'verbose_name': '카탈로그 버전',
+                'verbose_name_plural': '카탈로그 버전들',
+            },
+        ),
+    ]
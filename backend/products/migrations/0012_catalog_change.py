@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0011_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', '상품'), ('category', '카테고리')], max_length=20, verbose_name='종류')),
+                ('object_id', models.BigIntegerField(verbose_name='객체 ID')),
+                ('version', models.PositiveBigIntegerField(verbose_name='버전')),
+                ('deleted', models.BooleanField(default=False, verbose_name='삭제됨')),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_changes', to=settings.AUTH_USER_MODEL, verbose_name='판매자')),
+            ],
+            options={
+                'verbose_name': '카탈로그 변경',
+                'verbose_name_plural': '카탈로그 변경들',
+                'indexes': [models.Index(fields=['merchant', 'version'], name='catalog_change_version_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='catalogchange',
+            constraint=models.UniqueConstraint(fields=('merchant', 'kind', 'object_id'), name='catalog_change_object_unique'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='작업 이름')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='작업 데이터')),
+                ('status', models.CharField(choices=[('queued', '대기'), ('running', '실행 중'), ('failed', '실패')], default='queued', max_length=10, verbose_name='상태')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='시도 횟수')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='최대 시도 횟수')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='실행 예정 시각')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='잠금 만료 시각')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='처리 워커')),
+                ('last_error', models.TextField(blank=True, verbose_name='마지막 오류')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '백그라운드 작업',
+                'verbose_name_plural': '백그라운드 작업들',
+                'indexes': [models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'), models.Index(fields=['status', 'locked_until'], name='task_status_locked_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:38
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_background_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='파일 경로')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='파일 크기')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='참조 수')),
+                ('variants', models.JSONField(blank=True, default=dict, verbose_name='이미지 변형')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': '이미지 파일',
+                'verbose_name_plural': '이미지 파일들',
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='imageblob_orphan_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_image_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='track_stock',
+            field=models.BooleanField(default=False, verbose_name='재고 관리'),
+        ),
+    ]
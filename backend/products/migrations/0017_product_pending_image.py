@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_product_track_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='pending_image',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='처리 대기 이미지'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+"""
+Shared HTTP client for Cashu mint proxy calls
+
+One requests.Session per process keeps TCP+TLS connections to each mint
+alive between requests, so a swap followed by a melt against the same mint
+reuses a warm connection. urllib3 keeps a separate pool per host; both the
+number of host pools and the connections kept per host are bounded.
+
+Settings:
+
+- ``MINT_HTTP_CONNECT_TIMEOUT`` / ``MINT_HTTP_READ_TIMEOUT`` (seconds)
+- ``MINT_HTTP_POOL_CONNECTIONS``: number of mint hosts to keep pools for
+- ``MINT_HTTP_POOL_MAXSIZE``: idle connections kept per mint host
+
+``AsyncMintClient`` is the httpx equivalent used by the ASGI views in
+``products.async_views``; it must only be used from one event loop.
+"""
+
+import threading
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+def normalize_mint_url(mint_url):
+    """Strip whitespace and trailing slashes from a mint URL."""
+    return (mint_url or '').strip().rstrip('/')
+
+
+class MintClient:
+    """
+    Keep-alive HTTP client for Cashu mint APIs
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=30, pool_connections=10, pool_maxsize=10):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({'Accept': 'application/json'})
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, mint_url, path):
+        return f"{normalize_mint_url(mint_url)}/{path.lstrip('/')}"
+
+    def get(self, mint_url, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(self.url(mint_url, path), **kwargs)
+
+    def post(self, mint_url, path, payload, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.post(self.url(mint_url, path), json=payload, **kwargs)
+
+
+class AsyncMintClient:
+    """
+    Keep-alive async HTTP client for Cashu mint APIs (ASGI mode)
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=30, pool_connections=10, pool_maxsize=10):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_connections * pool_maxsize,
+                max_keepalive_connections=pool_maxsize,
+            ),
+            headers={'Accept': 'application/json'},
+        )
+
+    def url(self, mint_url, path):
+        return f"{normalize_mint_url(mint_url)}/{path.lstrip('/')}"
+
+    async def get(self, mint_url, path, **kwargs):
+        return await self.client.get(self.url(mint_url, path), **kwargs)
+
+    async def post(self, mint_url, path, payload, **kwargs):
+        return await self.client.post(self.url(mint_url, path), json=payload, **kwargs)
+
+
+def _client_options():
+    return {
+        'connect_timeout': getattr(settings, 'MINT_HTTP_CONNECT_TIMEOUT', 5),
+        'read_timeout': getattr(settings, 'MINT_HTTP_READ_TIMEOUT', 30),
+        'pool_connections': getattr(settings, 'MINT_HTTP_POOL_CONNECTIONS', 10),
+        'pool_maxsize': getattr(settings, 'MINT_HTTP_POOL_MAXSIZE', 10),
+    }
+
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_mint_client():
+    """Return the process-wide mint client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MintClient(**_client_options())
+    return _client
+
+
+def get_async_mint_client():
+    """Return the process-wide async mint client (ASGI event loop only)."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMintClient(**_client_options())
+    return _async_client
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -39,9 +40,14 @@ class Product(models.Model):
     )
     image_url = models.URLField(blank=True, verbose_name='이미지 URL')
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name='이미지 파일')
+    image_variants = models.JSONField(default=dict, blank=True, verbose_name='이미지 변형')
+    # Staged upload (products.uploads) waiting to replace image
+    pending_image = models.CharField(max_length=100, blank=True, default='', verbose_name='처리 대기 이미지')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='카테고리')
     is_available = models.BooleanField(default=True, verbose_name='판매 가능')
     stock_quantity = models.PositiveIntegerField(default=0, verbose_name='재고 수량')
+    # Orders only check and decrement stock_quantity when this is on
+    track_stock = models.BooleanField(default=False, verbose_name='재고 관리')
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='생성자')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -50,6 +56,20 @@ class Product(models.Model):
         verbose_name = '상품'
         verbose_name_plural = '상품들'
         ordering = ['-created_at']
+        indexes = [
+            # Merchant catalog listing (available products, newest first)
+            models.Index(
+                fields=['created_by', '-created_at'],
+                condition=models.Q(is_available=True),
+                name='product_available_idx',
+            ),
+            # Same listing filtered by category
+            models.Index(
+                fields=['created_by', 'category', '-created_at'],
+                condition=models.Q(is_available=True),
+                name='product_available_cat_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.name
@@ -60,14 +80,28 @@ class Product(models.Model):
         if self.image:
             return self.image.url
         return self.image_url or ''
+    
+    @property
+    def image_variant_urls(self):
+        """크기별 WebP 이미지 URL 맵 (thumb/grid/detail, 변형이 없으면 빈 dict)"""
+        from .images import variant_urls
+        return variant_urls(self.image_variants) if self.image else {}
 
 
 class CartItem(models.Model):
     """
-    장바구니 아이템 모델
+    장바구니 아이템 모델 (product가 없으면 커스텀 금액 아이템)
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='사용자')
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name='상품')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, verbose_name='상품')
+    custom_name = models.CharField(max_length=200, blank=True, verbose_name='커스텀 상품명')
+    custom_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name='커스텀 금액'
+    )
     quantity = models.PositiveIntegerField(default=1, verbose_name='수량')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -78,11 +112,27 @@ class CartItem(models.Model):
         unique_together = ['user', 'product']
     
     def __str__(self):
-        return f"{self.user.username} - {self.product.name} x{self.quantity}"
+        return f"{self.user.username} - {self.name} x{self.quantity}"
+    
+    @property
+    def is_custom(self):
+        return self.product_id is None
+    
+    @property
+    def name(self):
+        return self.custom_name if self.is_custom else self.product.name
+    
+    @property
+    def unit_price(self):
+        return self.custom_price if self.is_custom else self.product.price
+    
+    @property
+    def image_display_url(self):
+        return '' if self.is_custom else self.product.image_display_url
     
     @property
     def total_price(self):
-        return self.product.price * self.quantity
+        return self.unit_price * self.quantity
 
 
 class Order(models.Model):
@@ -117,6 +167,10 @@ class Order(models.Model):
         verbose_name = '주문'
         verbose_name_plural = '주문들'
         ordering = ['-created_at']
+        indexes = [
+            # Order history cursor pagination (user, -created_at, -id)
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"주문 {self.order_number} - {self.user.username}"
@@ -127,7 +181,8 @@ class OrderItem(models.Model):
     주문 아이템 모델
     """
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE, verbose_name='주문')
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name='상품')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, verbose_name='상품')
+    custom_name = models.CharField(max_length=200, blank=True, verbose_name='커스텀 상품명')
     quantity = models.PositiveIntegerField(verbose_name='수량')
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='단가')
     total_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='총가격')
@@ -137,4 +192,129 @@ class OrderItem(models.Model):
         verbose_name_plural = '주문 아이템들'
     
     def __str__(self):
-        return f"{self.order.order_number} - {self.product.name} x{self.quantity}"
+        return f"{self.order.order_number} - {self.name} x{self.quantity}"
+    
+    @property
+    def name(self):
+        return self.product.name if self.product_id else self.custom_name
+
+
+class PaymentRequest(models.Model):
+    """
+    Cashu NUT-18 결제 요청 모델 (워커 간 공유 저장소)
+    """
+    payment_id = models.CharField(max_length=100, unique=True, verbose_name='결제 요청 ID')
+    payload = models.JSONField(default=dict, verbose_name='결제 데이터')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name = '결제 요청'
+        verbose_name_plural = '결제 요청들'
+    
+    def __str__(self):
+        return self.payment_id
+
+
+class CatalogVersion(models.Model):
+    """
+    판매자별 상품 카탈로그 버전 (상품/카테고리 변경 시 증가)
+    """
+    merchant = models.OneToOneField(User, on_delete=models.CASCADE, related_name='catalog_version', verbose_name='판매자')
+    version = models.PositiveBigIntegerField(default=0, verbose_name='버전')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '카탈로그 버전'
+        verbose_name_plural = '카탈로그 버전들'
+    
+    def __str__(self):
+        return f"{self.merchant_id} v{self.version}"
+
+
+class CatalogChange(models.Model):
+    """
+    카탈로그 변경 기록 (객체별 마지막 변경 버전, 삭제 시 툼스톤)
+    """
+    KIND_CHOICES = [
+        ('product', '상품'),
+        ('category', '카테고리'),
+    ]
+    
+    merchant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='catalog_changes', verbose_name='판매자')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='종류')
+    object_id = models.BigIntegerField(verbose_name='객체 ID')
+    version = models.PositiveBigIntegerField(verbose_name='버전')
+    deleted = models.BooleanField(default=False, verbose_name='삭제됨')
+    
+    class Meta:
+        verbose_name = '카탈로그 변경'
+        verbose_name_plural = '카탈로그 변경들'
+        constraints = [
+            models.UniqueConstraint(fields=['merchant', 'kind', 'object_id'], name='catalog_change_object_unique'),
+        ]
+        indexes = [
+            # Delta sync: changes of a merchant after a version
+            models.Index(fields=['merchant', 'version'], name='catalog_change_version_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.merchant_id} {self.kind}:{self.object_id} v{self.version}"
+
+
+class ImageBlob(models.Model):
+    """
+    내용 주소(SHA-256) 기반 상품 이미지 파일 (같은 이미지는 파일 하나를 공유)
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    path = models.CharField(max_length=255, unique=True, verbose_name='파일 경로')
+    size = models.PositiveIntegerField(default=0, verbose_name='파일 크기')
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='참조 수')
+    variants = models.JSONField(default=dict, blank=True, verbose_name='이미지 변형')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = '이미지 파일'
+        verbose_name_plural = '이미지 파일들'
+        indexes = [
+            # Orphan sweep: unreferenced blobs past the grace period
+            models.Index(fields=['ref_count', 'updated_at'], name='imageblob_orphan_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.path} ({self.ref_count})"
+
+
+class BackgroundTask(models.Model):
+    """
+    백그라운드 작업 큐 (run_task_worker 명령이 처리)
+    """
+    STATUS_CHOICES = [
+        ('queued', '대기'),
+        ('running', '실행 중'),
+        ('failed', '실패'),
+    ]
+    
+    name = models.CharField(max_length=100, verbose_name='작업 이름')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='작업 데이터')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name='상태')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='시도 횟수')
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name='최대 시도 횟수')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='실행 예정 시각')
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name='잠금 만료 시각')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='처리 워커')
+    last_error = models.TextField(blank=True, verbose_name='마지막 오류')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '백그라운드 작업'
+        verbose_name_plural = '백그라운드 작업들'
+        indexes = [
+            # Worker polling: due queued tasks and expired running leases
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+            models.Index(fields=['status', 'locked_until'], name='task_status_locked_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
@@ -0,0 +1,96 @@
+"""
+Time-ordered order number generator
+
+Order numbers are fixed-width uppercase base36 strings:
+
+    TTTTTTTTT NN PPPPP SSS
+    |         |  |     sequence within the millisecond (per process)
+    |         |  process id
+    |         node id (ORDER_NUMBER_NODE_ID, one per server)
+    milliseconds since the Unix epoch
+
+A (node, pid) pair identifies one gunicorn worker, and each worker hands out
+distinct (timestamp, sequence) pairs, so numbers never collide and no
+insert-and-retry is needed. Because the timestamp comes first and every
+field has a fixed width, numbers sort by creation time, and inserts into the
+unique index on `Order.order_number` land at its right-hand edge.
+"""
+
+import os
+import threading
+import time
+
+from django.conf import settings
+
+BASE36_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+TIMESTAMP_WIDTH = 9  # 36**9 ms lasts until the year 5138
+NODE_WIDTH = 2
+PID_WIDTH = 5  # Covers Linux pid_max (4194304)
+SEQUENCE_WIDTH = 3
+MAX_SEQUENCE = 36 ** SEQUENCE_WIDTH - 1
+
+
+def _base36(value, width):
+    digits = []
+    remaining = value
+    while remaining:
+        remaining, remainder = divmod(remaining, 36)
+        digits.append(BASE36_DIGITS[remainder])
+    encoded = ''.join(reversed(digits)) or '0'
+    if len(encoded) > width:
+        raise ValueError(f'{value} does not fit in {width} base36 digits')
+    return encoded.rjust(width, '0')
+
+
+class OrderNumberGenerator:
+    """
+    Generate unique, sortable order numbers for one node
+    """
+
+    def __init__(self, node_id=0, clock=None):
+        if not 0 <= node_id < 36 ** NODE_WIDTH:
+            raise ValueError(f'node_id must be between 0 and {36 ** NODE_WIDTH - 1}')
+        self.node = _base36(node_id, NODE_WIDTH)
+        self._clock = clock or (lambda: int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self._last_timestamp = 0
+        self._sequence = 0
+
+    def _next_timestamp_and_sequence(self):
+        with self._lock:
+            # Never go back in time, even if the system clock does
+            timestamp = max(self._clock(), self._last_timestamp)
+            if timestamp == self._last_timestamp:
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # Sequence exhausted for this millisecond; borrow the next one
+                    timestamp += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_timestamp = timestamp
+            return timestamp, self._sequence
+
+    def next(self):
+        timestamp, sequence = self._next_timestamp_and_sequence()
+        return (
+            _base36(timestamp, TIMESTAMP_WIDTH)
+            + self.node
+            # Read on every call so forked workers never share a value
+            + _base36(os.getpid(), PID_WIDTH)
+            + _base36(sequence, SEQUENCE_WIDTH)
+        )
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def next_order_number():
+    """Return a new order number from the process-wide generator."""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = OrderNumberGenerator(getattr(settings, 'ORDER_NUMBER_NODE_ID', 0))
+    return _generator.next()
@@ -0,0 +1,99 @@
+"""
+Order creation pipeline
+
+`create_order_from_cart` turns a user's cart into an order in one
+transaction with a fixed number of queries however many lines the cart has:
+
+1. load the cart once with its products (`select_related`)
+2. insert the order and all its items (`bulk_create`)
+3. decrement stock with one conditional `F()` update per product, so two
+   concurrent orders can never take the same unit of stock
+4. clear the cart
+
+Only products with `track_stock` enabled are checked and decremented;
+stock_quantity of other products (and custom amount lines) is left alone.
+The decrement is not a catalog change: catalog payloads leave out
+stock_quantity (`CatalogProductSerializer`), so sales keep kiosk ETags valid.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .cart import invalidate_cart
+from .models import CartItem, Order, OrderItem, Product
+from .order_numbers import next_order_number
+
+
+class OrderError(Exception):
+    """
+    Order creation failure with the HTTP status to return
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _stock_quantities(cart_items):
+    quantities = {}
+    for item in cart_items:
+        if not item.is_custom and item.product.track_stock:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def create_order_from_cart(user, payment_method, discount_percentage=0):
+    """
+    Create an order from the user's cart and return it.
+
+    Raises OrderError when the cart is empty or a stock-tracked product is
+    out of stock; nothing is written in that case.
+    """
+    with transaction.atomic():
+        cart_items = list(CartItem.objects.filter(user=user).select_related('product'))
+        if not cart_items:
+            raise OrderError('장바구니가 비어있습니다.')
+
+        subtotal = sum((item.total_price for item in cart_items), Decimal('0'))
+        discount_percentage = Decimal(str(discount_percentage or 0))
+        discount_amount = subtotal * (discount_percentage / 100)
+
+        order = Order.objects.create(
+            user=user,
+            order_number=next_order_number(),
+            payment_method=payment_method,
+            subtotal=subtotal,
+            discount_percentage=discount_percentage,
+            discount_amount=discount_amount,
+            total_amount=subtotal - discount_amount,
+            status='pending'
+        )
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=item.product,
+                custom_name=item.custom_name,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                total_price=item.total_price
+            )
+            for item in cart_items
+        ])
+
+        # Sorted so concurrent orders lock product rows in the same order
+        products = {item.product_id: item.product for item in cart_items}
+        for product_id, quantity in sorted(_stock_quantities(cart_items).items()):
+            updated = Product.objects.filter(
+                id=product_id, stock_quantity__gte=quantity
+            ).update(stock_quantity=F('stock_quantity') - quantity)
+            if not updated:
+                # Rolls back the order and any stock already taken
+                raise OrderError(f"'{products[product_id].name}' 상품의 재고가 부족합니다.", 409)
+
+        CartItem.objects.filter(user=user).delete()
+
+    invalidate_cart(user.id)
+    return order
@@ -0,0 +1,403 @@
+"""
+Cashu NUT-18 payment request storage
+
+Proofs are POSTed by the payer's wallet and polled by the kiosk, and with
+several gunicorn workers those two requests rarely land in the same process.
+Every backend here is therefore reachable from any worker except ``memory``,
+which is kept for single-process development servers.
+
+The backend is chosen with the ``PAYMENT_REQUEST_STORE`` setting:
+
+- ``memory``: module-level dict (single process only)
+- ``database``: ``PaymentRequest`` table in the default database
+- ``redis``: any server speaking the Redis protocol (``PAYMENT_REQUEST_REDIS_URL``)
+
+Expired requests are never returned by any backend. Deleting them is kept out
+of the request path: the task worker runs `cleanup()` periodically
+(``products.sweep_payment_requests``), and the memory store sweeps itself.
+"""
+
+import heapq
+import json
+import socket
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+PAYMENT_REQUEST_TTL_SECONDS = 10 * 60  # Keep payment data for 10 minutes
+PAYMENT_REQUEST_CLEANUP_INTERVAL_SECONDS = 30  # Gap between sweeps by the task worker
+PAYMENT_REQUEST_WAIT_POLL_SECONDS = 0.5  # Re-check interval for stores without push (one query each)
+
+
+class PaymentRequestStore:
+    """
+    결제 요청 저장소 기본 클래스
+    """
+    ttl_seconds = PAYMENT_REQUEST_TTL_SECONDS
+    # True when wait() is woken by set() instead of re-checking with get()
+    push_wait = False
+
+    def get(self, payment_id):
+        """Return the stored payment data or None if missing/expired."""
+        raise NotImplementedError
+
+    def set(self, payment_id, data):
+        """Store (or replace) payment data for payment_id."""
+        raise NotImplementedError
+
+    def pop(self, payment_id):
+        """
+        Remove payment data and return it (None if missing/expired).
+
+        Atomic: with concurrent callers only one of them gets the data.
+        """
+        raise NotImplementedError
+
+    def cleanup(self):
+        """Remove expired payment requests."""
+        raise NotImplementedError
+
+    def wait(self, payment_id, timeout):
+        """
+        Block until payment data for payment_id exists or timeout elapses.
+
+        Backends without a push mechanism re-check every
+        PAYMENT_REQUEST_WAIT_POLL_SECONDS.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            data = self.get(payment_id)
+            if data:
+                return data
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(PAYMENT_REQUEST_WAIT_POLL_SECONDS, remaining))
+
+
+class MemoryPaymentRequestStore(PaymentRequestStore):
+    """
+    In-process store (only valid with a single worker)
+
+    Expiry is indexed by a min-heap of (expires_at, payment_id), so cleanup
+    only touches entries that have actually expired instead of scanning the
+    whole store. Replaced or consumed entries leave a stale heap item behind,
+    which is discarded when it reaches the top; each pushed item is popped at
+    most once, keeping cleanup amortized O(1) per stored request.
+    """
+
+    push_wait = True
+
+    def __init__(self):
+        self._entries = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+        self._stored = threading.Condition(self._lock)
+
+    def get(self, payment_id):
+        with self._lock:
+            entry = self._entries.get(payment_id)
+            if not entry:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                self._entries.pop(payment_id, None)
+                return None
+            return data
+
+    def set(self, payment_id, data):
+        # Worker processes cannot reach this store, so it sweeps on write
+        self.cleanup()
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[payment_id] = (expires_at, data)
+            heapq.heappush(self._expiry_heap, (expires_at, payment_id))
+            self._stored.notify_all()
+
+    def pop(self, payment_id):
+        with self._lock:
+            entry = self._entries.pop(payment_id, None)
+        if not entry or entry[0] <= time.monotonic():
+            # Expired entries are as missing as in get()
+            return None
+        return entry[1]
+
+    def cleanup(self):
+        now = time.monotonic()
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires_at, payment_id = heapq.heappop(heap)
+                entry = self._entries.get(payment_id)
+                # Skip stale heap items for replaced or consumed entries
+                if entry and entry[0] == expires_at:
+                    del self._entries[payment_id]
+
+    def wait(self, payment_id, timeout):
+        deadline = time.monotonic() + timeout
+        with self._stored:
+            while True:
+                entry = self._entries.get(payment_id)
+                now = time.monotonic()
+                if entry and entry[0] > now:
+                    return entry[1]
+                if now >= deadline:
+                    return None
+                self._stored.wait(deadline - now)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DatabasePaymentRequestStore(PaymentRequestStore):
+    """
+    Store backed by the PaymentRequest table (shared by all workers)
+
+    Reads filter on the indexed created_at column, so expired rows are never
+    returned even before they are swept. The sweep itself is an index range
+    delete run by the task worker every PAYMENT_REQUEST_CLEANUP_INTERVAL_SECONDS.
+    """
+
+    def _model(self):
+        from .models import PaymentRequest
+        return PaymentRequest
+
+    def _cutoff(self):
+        return timezone.now() - timedelta(seconds=self.ttl_seconds)
+
+    def get(self, payment_id):
+        payload = self._model().objects.filter(
+            payment_id=payment_id,
+            created_at__gte=self._cutoff()
+        ).values_list('payload', flat=True).first()
+        return payload
+
+    def set(self, payment_id, data):
+        self._model().objects.update_or_create(
+            payment_id=payment_id,
+            defaults={'payload': data, 'created_at': timezone.now()}
+        )
+
+    def pop(self, payment_id):
+        PaymentRequest = self._model()
+        with transaction.atomic():
+            row = PaymentRequest.objects.select_for_update().filter(
+                payment_id=payment_id,
+                created_at__gte=self._cutoff()
+            ).values_list('pk', 'payload').first()
+            if row is None:
+                return None
+            pk, payload = row
+            # Only the caller whose delete removed the row gets the payload
+            deleted, _ = PaymentRequest.objects.filter(pk=pk).delete()
+        return payload if deleted else None
+
+    def cleanup(self):
+        self._model().objects.filter(created_at__lt=self._cutoff()).delete()
+
+
+class RedisProtocolError(Exception):
+    """Error reply or malformed response from a Redis-protocol server."""
+
+
+class RespClient:
+    """
+    Minimal Redis protocol (RESP2) client
+
+    Only the handful of commands the stores need are used, so this avoids
+    adding a redis dependency; any RESP server (Redis, KeyDB, Valkey or a
+    local stand-in) can serve it. One connection is kept per thread.
+    """
+
+    def __init__(self, url, timeout=5):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int((parts.path or '/0').lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._send_and_read('AUTH', self.password)
+        if self.db:
+            self._send_and_read('SELECT', self.db)
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+        self._local.reader = None
+
+    def _encode(self, args):
+        chunks = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            chunks.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(chunks)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by Redis server')
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b'+':
+            return body.decode('utf-8')
+        if prefix == b'-':
+            raise RedisProtocolError(body.decode('utf-8'))
+        if prefix == b':':
+            return int(body)
+        if prefix == b'$':
+            length = int(body)
+            if length == -1:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            count = int(body)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisProtocolError(f'Unexpected reply: {line!r}')
+
+    def _send_and_read(self, *args):
+        self._local.sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def transaction(self, *commands):
+        """
+        Run commands atomically (MULTI/EXEC) and return their replies.
+
+        MULTI/EXEC works on every server version, unlike GETDEL (Redis 6.2+).
+        The whole block is written at once, so a retry after a dropped
+        connection never leaves a half-queued transaction behind.
+        """
+        payload = b''.join(
+            self._encode(args) for args in (('MULTI',), *commands, ('EXEC',))
+        )
+        for attempt in range(2):
+            if getattr(self._local, 'sock', None) is None:
+                self._connect()
+            try:
+                self._local.sock.sendall(payload)
+                replies = [self._read_reply() for _ in range(len(commands) + 2)]
+                return replies[-1]
+            except RedisProtocolError:
+                # Remaining replies of the block are still unread
+                self._close()
+                raise
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+
+    def execute(self, *args):
+        """Send a command and return its reply, reconnecting once on failure."""
+        for attempt in range(2):
+            if getattr(self._local, 'sock', None) is None:
+                self._connect()
+            try:
+                return self._send_and_read(*args)
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+
+
+class RedisPaymentRequestStore(PaymentRequestStore):
+    """
+    Store backed by a Redis-protocol server (expiry handled server-side)
+    """
+    key_prefix = 'nut18:payment:'
+    notify_prefix = 'nut18:notify:'
+    # BLPOP slice; keeps each blocking call inside the socket timeout and
+    # bounds the delay for extra waiters when one waiter takes the signal
+    wait_slice_seconds = 1
+    push_wait = True
+
+    def __init__(self, url):
+        self.client = RespClient(url)
+
+    def _key(self, payment_id):
+        return f'{self.key_prefix}{payment_id}'
+
+    def get(self, payment_id):
+        raw = self.client.execute('GET', self._key(payment_id))
+        return json.loads(raw) if raw else None
+
+    def _notify_key(self, payment_id):
+        return f'{self.notify_prefix}{payment_id}'
+
+    def set(self, payment_id, data):
+        self.client.execute(
+            'SET', self._key(payment_id), json.dumps(data), 'EX', self.ttl_seconds
+        )
+        notify_key = self._notify_key(payment_id)
+        self.client.execute('RPUSH', notify_key, 1)
+        self.client.execute('EXPIRE', notify_key, self.ttl_seconds)
+
+    def pop(self, payment_id):
+        key = self._key(payment_id)
+        replies = self.client.transaction(('GET', key), ('DEL', key))
+        raw = replies[0] if replies else None
+        return json.loads(raw) if raw else None
+
+    def cleanup(self):
+        # Keys are written with EX, so the server expires them on its own
+        return None
+
+    def wait(self, payment_id, timeout):
+        deadline = time.monotonic() + timeout
+        notify_key = self._notify_key(payment_id)
+        while True:
+            data = self.get(payment_id)
+            if data:
+                return data
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.client.execute(
+                'BLPOP', notify_key, f'{min(remaining, self.wait_slice_seconds):.2f}'
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def create_payment_request_store(backend=None):
+    """Build a store for the given backend name (defaults to settings)."""
+    backend = backend or getattr(settings, 'PAYMENT_REQUEST_STORE', 'database')
+    if backend == 'memory':
+        return MemoryPaymentRequestStore()
+    if backend == 'database':
+        return DatabasePaymentRequestStore()
+    if backend == 'redis':
+        return RedisPaymentRequestStore(
+            getattr(settings, 'PAYMENT_REQUEST_REDIS_URL', 'redis://127.0.0.1:6379/0')
+        )
+    raise ValueError(f'Unknown payment request store backend: {backend}')
+
+
+def get_payment_request_store():
+    """Return the process-wide payment request store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_payment_request_store()
+    return _store
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from .models import Category, Product, CartItem, Order, OrderItem
+from .images import IMAGE_VARIANTS, InvalidImage, validate_upload
+from .task_queue import enqueue
+from .uploads import stage_upload
 import base64
-import uuid
-from django.core.files.base import ContentFile
+import binascii
 from decimal import Decimal
 
 
@@ -21,6 +23,9 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class ProductSerializer(serializers.ModelSerializer):
     image_display_url = serializers.ReadOnlyField()
+    image_variants = serializers.ReadOnlyField(source='image_variant_urls')
+    image_srcset = serializers.SerializerMethodField()
+    image_pending = serializers.SerializerMethodField()
     category_name = serializers.CharField(source='category.name', read_only=True)
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     # Override image_url to accept any string (including base64)
@@ -30,16 +35,30 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             'id', 'name', 'description', 'price', 'regular_price', 'image_url', 'image', 
-            'image_display_url', 'category', 'category_name', 'is_available', 
-            'stock_quantity', 'created_by', 'created_by_username', 'created_at', 'updated_at'
+            'image_display_url', 'image_variants', 'image_srcset', 'image_pending', 'category', 'category_name',
+            'is_available', 'stock_quantity', 'track_stock', 'created_by', 'created_by_username', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_by', 'created_by_username', 'created_at', 'updated_at']
     
+    def get_image_srcset(self, obj):
+        """<img srcset> 값 (예: '/media/..._thumb.webp 160w, ...'), 변형이 없으면 빈 문자열"""
+        variants = obj.image_variant_urls
+        request = self.context.get('request')
+        entries = []
+        for name in IMAGE_VARIANTS:
+            if name in variants:
+                url = variants[name]['url']
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                entries.append(f"{url} {variants[name]['width']}w")
+        return ', '.join(entries)
+    
+    def get_image_pending(self, obj):
+        """새 이미지가 작업 워커에서 처리 중이면 True (image는 아직 이전 이미지)"""
+        return bool(obj.pending_image)
+    
     def validate(self, attrs):
         """Custom validation to handle base64 image data"""
-        # Process image data before validation
-        attrs = self._process_image_data(attrs)
-        
         price = attrs.get('price', getattr(self.instance, 'price', None))
         regular_price = attrs.get('regular_price', getattr(self.instance, 'regular_price', None))
         
@@ -57,61 +76,54 @@ class ProductSerializer(serializers.ModelSerializer):
                     'regular_price': '정가는 판매 가격보다 크거나 같아야 합니다.'
                 })
         
+        # Staged last, so a request rejected above leaves no staged file behind
+        attrs = self._process_image_data(attrs)
         return super().validate(attrs)
     
     def _process_image_data(self, validated_data):
-        """Process base64 image data and convert to image file"""
+        """Check base64 or uploaded image data and stage it for the task worker"""
+        self._staged_image = None
         image_url = validated_data.get('image_url', '')
         
         # Check if image_url contains base64 data
         if image_url and image_url.startswith('data:image/'):
             try:
-                # Extract format and data
-                header, data = image_url.split(';base64,')
-                format_type = header.split('/')[-1].lower()  # e.g., 'jpeg', 'png'
-                
-                # Validate image format
-                allowed_formats = ['jpeg', 'jpg', 'png', 'gif', 'webp']
-                if format_type not in allowed_formats:
-                    raise serializers.ValidationError({
-                        'image_url': f'지원되지 않는 이미지 형식입니다. 지원 형식: {", ".join(allowed_formats)}'
-                    })
-                
-                # Decode base64 data
-                image_data = base64.b64decode(data)
-                
-                # Check image size (max 5MB)
-                if len(image_data) > 5 * 1024 * 1024:
-                    raise serializers.ValidationError({
-                        'image_url': '이미지 파일이 너무 큽니다. 최대 5MB까지 업로드 가능합니다.'
-                    })
-                
-                # Create a unique filename
-                filename = f"product_{uuid.uuid4().hex[:8]}.{format_type}"
-                
-                # Create ContentFile from image data
-                image_file = ContentFile(image_data, name=filename)
-                
-                # Set the image field and clear image_url
-                validated_data['image'] = image_file
-                validated_data['image_url'] = ''
-                
-            except ValueError as e:
+                _, data = image_url.split(';base64,')
+                image_data = base64.b64decode(data, validate=True)
+            except (ValueError, binascii.Error):
                 raise serializers.ValidationError({
                     'image_url': '잘못된 base64 이미지 데이터 형식입니다.'
                 })
-            except Exception as e:
-                raise serializers.ValidationError({
-                    'image_url': f'이미지 처리 중 오류가 발생했습니다: {str(e)}'
-                })
+            
+            # The real format is checked from the data, not the data URL header
+            validated_data['pending_image'] = self._stage_upload('image_url', image_data)
+            validated_data['image_url'] = ''
         elif image_url and not image_url.startswith(('http://', 'https://')):
             # If it's not base64 and not a valid URL, raise error
             raise serializers.ValidationError({
                 'image_url': '유효한 URL을 입력하거나 이미지 파일을 업로드해주세요.'
             })
+        elif validated_data.get('image'):
+            # Multipart upload (streamed to a temporary file by ImageUploadHandler)
+            validated_data['pending_image'] = self._stage_upload('image', validated_data.pop('image'))
         
         return validated_data
     
+    def _stage_upload(self, field, image_data):
+        # Size and header only; decoding and re-encoding run in the task worker
+        try:
+            validate_upload(image_data)
+        except InvalidImage as e:
+            raise serializers.ValidationError({field: str(e)})
+        self._staged_image = stage_upload(image_data)
+        return self._staged_image
+    
+    def _queue_image_processing(self, instance):
+        # Product.image keeps the previous image until the task swaps it
+        if getattr(self, '_staged_image', None):
+            enqueue('products.process_product_image', {'product_id': instance.id, 'upload': self._staged_image})
+        return instance
+    
     def create(self, validated_data):
         # Set the creator as the current user
         validated_data['created_by'] = self.context['request'].user
@@ -119,32 +131,46 @@ class ProductSerializer(serializers.ModelSerializer):
         regular_price = validated_data.get('regular_price')
         if regular_price is None and price is not None:
             validated_data['regular_price'] = price
-        return super().create(validated_data)
+        return self._queue_image_processing(super().create(validated_data))
     
     def update(self, instance, validated_data):
         if 'regular_price' in validated_data:
             if validated_data['regular_price'] is None:
                 validated_data['regular_price'] = validated_data.get('price', instance.price)
-        return super().update(instance, validated_data)
+        return self._queue_image_processing(super().update(instance, validated_data))
+
+
+class CatalogProductSerializer(ProductSerializer):
+    """
+    Product in the versioned catalog payloads (products.catalog)
+
+    stock_quantity changes with every sale of a tracked product, and orders
+    do not bump the catalog version, so it is left out here; the product
+    detail endpoint returns the current value.
+    """
+
+    class Meta(ProductSerializer.Meta):
+        fields = [field for field in ProductSerializer.Meta.fields if field != 'stock_quantity']
 
 
 class CartItemSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source='product.name', read_only=True)
-    product_price = serializers.DecimalField(source='product.price', max_digits=10, decimal_places=2, read_only=True)
-    product_image = serializers.CharField(source='product.image_display_url', read_only=True)
+    product_name = serializers.CharField(source='name', read_only=True)
+    product_price = serializers.DecimalField(source='unit_price', max_digits=10, decimal_places=2, read_only=True)
+    product_image = serializers.CharField(source='image_display_url', read_only=True)
     total_price = serializers.ReadOnlyField()
+    is_custom = serializers.ReadOnlyField()
     
     class Meta:
         model = CartItem
         fields = [
             'id', 'product', 'product_name', 'product_price', 'product_image',
-            'quantity', 'total_price', 'created_at', 'updated_at'
+            'quantity', 'total_price', 'is_custom', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_name = serializers.CharField(source='name', read_only=True)
     
     class Meta:
         model = OrderItem
@@ -169,7 +195,8 @@ class CreateOrderSerializer(serializers.Serializer):
     payment_method = serializers.ChoiceField(choices=Order.PAYMENT_METHOD_CHOICES)
     discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, default=0)
     cart_items = serializers.ListField(
-        child=serializers.DictField(child=serializers.CharField()),
+        # product_id is null for custom amount items
+        child=serializers.DictField(child=serializers.CharField(allow_null=True)),
         write_only=True
     )
     
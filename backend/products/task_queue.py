@@ -0,0 +1,152 @@
+"""
+Database-backed background task queue
+
+Slow work (image variants, expiry sweeps, ...) is queued as a
+`BackgroundTask` row and executed by `python manage.py run_task_worker`,
+so requests only pay for an INSERT. Because the queue lives in the default
+database, a task enqueued inside a transaction only becomes visible to
+workers once that transaction commits.
+
+- Workers claim due tasks with a conditional UPDATE and hold them for a
+  visibility timeout (``TASK_VISIBILITY_TIMEOUT``). A task whose worker
+  died is claimed again once its lease expires.
+- Failures are retried with exponential backoff until ``max_attempts``;
+  then the task stays in the table as ``failed`` with its last error.
+- Finished tasks are deleted.
+
+Tasks are plain functions registered with `register_task`; the payload is
+passed as keyword arguments and must be JSON-serializable. Tasks may run
+more than once (retries, expired leases), so they should be idempotent.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 60 * 60
+
+_registry = {}
+_periodic = {}
+
+
+def register_task(name, every=None):
+    """
+    Register a function as task `name`.
+
+    `every` (seconds) makes it periodic: workers keep one instance queued
+    and schedule the next run `every` seconds after the previous one.
+    """
+    def decorator(func):
+        _registry[name] = func
+        if every:
+            _periodic[name] = every
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """Queue task `name` with keyword arguments `payload`; returns the BackgroundTask."""
+    if name not in _registry:
+        raise KeyError(f'Unknown task: {name}')
+    return BackgroundTask.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or getattr(settings, 'TASK_MAX_ATTEMPTS', 5),
+    )
+
+
+def schedule_periodic_tasks():
+    """Queue each periodic task that has no queued or running instance."""
+    active = set(
+        BackgroundTask.objects.filter(name__in=list(_periodic), status__in=['queued', 'running'])
+        .values_list('name', flat=True)
+    )
+    for name, every in _periodic.items():
+        if name not in active:
+            # Concurrent workers can both queue one; periodic tasks are idempotent
+            enqueue(name, delay=every)
+
+
+def claim_tasks(worker_id, limit, visibility_timeout=None):
+    """
+    Lease up to `limit` due tasks for `worker_id` and return them.
+
+    Each task is claimed with an UPDATE conditioned on the state it was read
+    in, so two workers never both claim it.
+    """
+    visibility_timeout = visibility_timeout or getattr(settings, 'TASK_VISIBILITY_TIMEOUT', 300)
+    now = timezone.now()
+    # Two index range reads instead of one OR query that has to be sorted
+    fields = ('id', 'status', 'locked_until')
+    candidates = list(
+        BackgroundTask.objects.filter(status='running', locked_until__lt=now)
+        .order_by('locked_until').values_list(*fields)[:limit]
+    )
+    if len(candidates) < limit:
+        candidates += BackgroundTask.objects.filter(status='queued', run_at__lte=now).order_by(
+            'run_at'
+        ).values_list(*fields)[:limit - len(candidates)]
+
+    locked_until = now + timedelta(seconds=visibility_timeout)
+    claimed_ids = []
+    for task_id, task_status, task_locked_until in candidates:
+        claimed = BackgroundTask.objects.filter(
+            id=task_id, status=task_status, locked_until=task_locked_until
+        ).update(
+            status='running', locked_by=worker_id, locked_until=locked_until,
+            attempts=F('attempts') + 1, updated_at=now,
+        )
+        if claimed:
+            claimed_ids.append(task_id)
+    return list(BackgroundTask.objects.filter(id__in=claimed_ids).order_by('run_at', 'id'))
+
+
+def _lease(task):
+    # Result writes only apply while this worker still holds the lease
+    return BackgroundTask.objects.filter(id=task.id, locked_by=task.locked_by, locked_until=task.locked_until)
+
+
+def _fail(task, error):
+    now = timezone.now()
+    if task.attempts >= task.max_attempts:
+        logger.error('Task %s #%s failed permanently: %s', task.name, task.id, error)
+        _lease(task).update(status='failed', locked_until=None, last_error=error, updated_at=now)
+        return
+    delay = min(RETRY_BASE_SECONDS * 2 ** (task.attempts - 1), RETRY_MAX_SECONDS)
+    logger.warning('Task %s #%s failed (attempt %s/%s), retrying in %ss',
+                   task.name, task.id, task.attempts, task.max_attempts, delay)
+    _lease(task).update(
+        status='queued', locked_until=None, last_error=error,
+        run_at=now + timedelta(seconds=delay), updated_at=now,
+    )
+
+
+def run_task(task):
+    """Execute a claimed task; returns True if it succeeded."""
+    func = _registry.get(task.name)
+    if func is None:
+        task.attempts = task.max_attempts
+        _fail(task, f'Unknown task: {task.name}')
+        return False
+    if task.attempts > task.max_attempts:
+        # Its lease expired on the last attempt (e.g. the worker was killed)
+        _fail(task, task.last_error or 'Visibility timeout expired')
+        return False
+
+    try:
+        func(**task.payload)
+    except Exception:
+        _fail(task, traceback.format_exc(limit=5))
+        return False
+    _lease(task).delete()
+    return True
@@ -0,0 +1,109 @@
+"""
+Background tasks (see `products.task_queue`)
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .blobs import collect_image_blobs, store_blob
+from .images import InvalidImage, delete_image_variants, process_upload, save_image_variants
+from .models import BackgroundTask, Product
+from .payment_store import PAYMENT_REQUEST_CLEANUP_INTERVAL_SECONDS, get_payment_request_store
+from .task_queue import register_task
+from .uploads import pending_storage, prune_pending_uploads
+
+logger = logging.getLogger(__name__)
+
+FAILED_TASK_RETENTION_DAYS = 7
+
+
+@register_task('products.generate_image_variants')
+def generate_image_variants(product_id, image):
+    """이미지 `image`가 아직 상품 이미지이면 WebP 변형 생성"""
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None or product.image.name != image:
+        # Deleted or replaced since; the newer upload queued its own task
+        return
+    save_image_variants(product)
+
+
+@register_task('products.process_product_image')
+def process_product_image(product_id, upload):
+    """업로드된 원본(`upload`)을 정제해 상품 이미지로 교체하고 WebP 변형 생성"""
+    if not Product.objects.filter(pk=product_id, pending_image=upload).exists():
+        # Deleted or replaced since; the newer upload queued its own task
+        pending_storage.delete(upload)
+        return
+
+    if not pending_storage.exists(upload):
+        # Pruned or lost (e.g. the worker runs on another host); keep the current image
+        logger.warning('Staged image upload %s for product %s is missing', upload, product_id)
+        Product.objects.filter(pk=product_id, pending_image=upload).update(pending_image='')
+        return
+
+    with pending_storage.open(upload, 'rb') as source:
+        try:
+            processed = process_upload(File(source, name=upload))
+        except InvalidImage as e:
+            # Passed the header check but does not decode; retrying cannot help
+            logger.warning('Discarding image upload for product %s: %s', product_id, e)
+            processed = None
+    if processed is None:
+        Product.objects.filter(pk=product_id, pending_image=upload).update(pending_image='')
+        pending_storage.delete(upload)
+        return
+
+    # Identical images share one content-addressed file
+    image = store_blob(processed.master)
+    with transaction.atomic():
+        product = Product.objects.select_for_update().filter(pk=product_id, pending_image=upload).first()
+        if product is not None:
+            previous_variants = product.image_variants
+            product.image = image
+            product.image_variants = {}
+            product.pending_image = ''
+            # save() so the catalog version, blob refcounts and carts follow
+            product.save(update_fields=['image', 'image_variants', 'pending_image'])
+    pending_storage.delete(upload)
+    if product is None:
+        # Replaced meanwhile; the unused blob is collected later
+        return
+    delete_image_variants(previous_variants)
+    save_image_variants(product, processed.image)
+
+
+@register_task('products.prune_pending_uploads', every=60 * 60)
+def prune_pending_uploads_task():
+    """처리되지 않은 오래된 업로드 원본 삭제"""
+    prune_pending_uploads()
+
+
+@register_task('products.delete_image_variants')
+def delete_image_variants_task(variants):
+    """삭제된 상품의 이미지 변형 파일 삭제"""
+    delete_image_variants(variants)
+
+
+@register_task('products.collect_image_blobs', every=10 * 60)
+def collect_image_blobs_task():
+    """참조가 끊긴 이미지 파일 삭제"""
+    collect_image_blobs()
+
+
+@register_task('products.sweep_payment_requests', every=PAYMENT_REQUEST_CLEANUP_INTERVAL_SECONDS)
+def sweep_payment_requests():
+    """만료된 결제 요청 삭제"""
+    get_payment_request_store().cleanup()
+
+
+@register_task('products.prune_failed_tasks', every=24 * 60 * 60)
+def prune_failed_tasks():
+    """오래된 실패 작업 기록 삭제"""
+    retention = getattr(settings, 'TASK_FAILED_RETENTION_DAYS', FAILED_TASK_RETENTION_DAYS)
+    cutoff = timezone.now() - timedelta(days=retention)
+    BackgroundTask.objects.filter(status='failed', updated_at__lt=cutoff).delete()
@@ -0,0 +1,205 @@
+from decimal import Decimal
+
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .cart import _cache_key, _cart_generation, add_custom_item, add_to_cart, get_cart_summary
+from .models import CartItem, Order, OrderItem, Product
+from .management.commands.check_query_plans import hot_queries, plan_problems, query_plan
+from .media_gc import collect_orphan_media
+
+
+class OrderListQueryTests(TestCase):
+    """주문 목록 조회 쿼리 수가 주문/항목 수와 무관한지 확인"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='orders', password='x')
+        self.products = Product.objects.bulk_create([
+            Product(name=f'product {index}', price=Decimal('1000')) for index in range(3)
+        ])
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+
+    def _create_orders(self, count):
+        start = Order.objects.count()
+        orders = Order.objects.bulk_create([
+            Order(
+                user=self.user,
+                order_number=f'TEST-{start + index}',
+                payment_method='cash',
+                subtotal=Decimal('3000'),
+                total_amount=Decimal('3000'),
+            )
+            for index in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1, unit_price=product.price, total_price=product.price)
+            for order in orders for product in self.products
+        ] + [
+            OrderItem(order=order, custom_name='custom', quantity=1, unit_price=Decimal('500'), total_price=Decimal('500'))
+            for order in orders
+        ])
+
+    def _get_orders(self):
+        response = self.client.get(reverse('order_list'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['orders']
+
+    def test_query_count_does_not_grow_with_orders(self):
+        # Orders (+ user) and their items (+ product)
+        self._create_orders(1)
+        with self.assertNumQueries(2):
+            orders = self._get_orders()
+        self.assertEqual(len(orders), 1)
+        self.assertEqual(len(orders[0]['items']), 4)
+
+        self._create_orders(15)
+        with self.assertNumQueries(2):
+            orders = self._get_orders()
+        self.assertEqual(len(orders), 16)
+        self.assertTrue(all(len(order['items']) == 4 for order in orders))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CartSummaryCacheTests(TestCase):
+    """장바구니 요약 캐시 무효화 확인"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cart', password='x')
+        self.product = Product.objects.create(name='product', price=Decimal('1000'))
+
+    def test_change_invalidates_summary(self):
+        self.assertEqual(get_cart_summary(self.user)['item_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_to_cart(self.user, self.product)
+        self.assertEqual(get_cart_summary(self.user)['item_count'], 1)
+        with self.assertNumQueries(0):
+            get_cart_summary(self.user)
+
+    def test_late_fill_with_old_rows_is_not_served(self):
+        # A read that loaded the empty cart before the change stores it afterwards
+        stale_key = _cache_key(self.user.id, _cart_generation(self.user.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            add_to_cart(self.user, self.product)
+        cache.set(stale_key, {'items': [], 'subtotal': '0.00', 'item_count': 0})
+
+        summary = get_cart_summary(self.user)
+        self.assertEqual(summary['item_count'], 1)
+        self.assertEqual(summary['subtotal'], '1000.00')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CartBatchTests(TestCase):
+    """장바구니 일괄 변경 API 확인"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='batch', password='x')
+        self.product = Product.objects.create(name='product', price=Decimal('1000'))
+        self.client = APIClient(HTTP_HOST='localhost')
+
+    def _batch(self, *operations):
+        return self.client.post(reverse('cart_batch'), {'operations': list(operations)}, format='json')
+
+    def test_custom_lines_by_item_id(self):
+        self.client.force_authenticate(self.user)
+        add_to_cart(self.user, self.product)
+        custom = add_custom_item(self.user, 'custom', Decimal('500'))
+        other = add_custom_item(self.user, 'other', Decimal('700'))
+
+        response = self._batch(
+            {'action': 'set', 'item_id': custom.id, 'quantity': 3},
+            {'action': 'remove', 'item_id': other.id},
+            {'action': 'add', 'product_id': self.product.id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subtotal'], '3500.00')
+        quantities = dict(CartItem.objects.filter(user=self.user).values_list('id', 'quantity'))
+        self.assertEqual(quantities[custom.id], 3)
+        self.assertNotIn(other.id, quantities)
+
+    def test_unknown_item_id_changes_nothing(self):
+        self.client.force_authenticate(self.user)
+        custom = add_custom_item(self.user, 'custom', Decimal('500'))
+        other_user = User.objects.create_user(username='other', password='x')
+        foreign = add_custom_item(other_user, 'foreign', Decimal('500'))
+
+        response = self._batch(
+            {'action': 'set', 'item_id': custom.id, 'quantity': 2},
+            {'action': 'remove', 'item_id': foreign.id},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(CartItem.objects.get(id=custom.id).quantity, 1)
+        self.assertTrue(CartItem.objects.filter(id=foreign.id).exists())
+
+    def test_session_custom_line_by_item_id(self):
+        session = self.client.session
+        session['cart'] = {
+            str(self.product.id): {'quantity': 1},
+            'custom_1a2b3c4d': {'quantity': 1, 'is_custom': True, 'name': 'custom', 'price': '500'},
+        }
+        session.save()
+
+        response = self._batch(
+            {'action': 'set', 'item_id': 'session_custom_1a2b3c4d', 'quantity': 2},
+            {'action': 'remove', 'item_id': f'session_{self.product.id}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subtotal'], '1000')
+        self.assertEqual(list(self.client.session['cart']), ['custom_1a2b3c4d'])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite only')
+class QueryPlanTests(TestCase):
+    """주요 쿼리가 인덱스를 사용하는지 확인 (check_query_plans와 같은 쿼리)"""
+
+    def test_hot_queries_use_an_index(self):
+        for label, queryset in hot_queries():
+            with self.subTest(label):
+                plan = query_plan(queryset)
+                self.assertEqual(plan_problems(plan, queryset.model._meta.db_table), [], plan)
+
+
+class OrphanMediaPathTests(TestCase):
+    """미디어 정리 경로가 MEDIA_ROOT 밖을 가리키지 않는지 확인"""
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.media_root = os.path.join(self.root.name, 'media')
+        self.outside = os.path.join(self.root.name, 'outside')
+        os.makedirs(os.path.join(self.media_root, 'products'))
+        os.makedirs(self.outside)
+        self.outside_file = os.path.join(self.outside, 'keep.jpg')
+        open(self.outside_file, 'wb').close()
+
+    def test_paths_outside_media_root_are_refused(self):
+        os.symlink(self.outside, os.path.join(self.media_root, 'products', 'link'))
+        for path in ('../outside', self.outside, 'products/link'):
+            with self.subTest(path):
+                with self.assertRaises(ValueError):
+                    collect_orphan_media(root=self.media_root, subdir=path, min_age_seconds=0)
+        self.assertTrue(os.path.exists(self.outside_file))
+
+    def test_command_rejects_outside_path(self):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            with self.assertRaises(CommandError):
+                call_command('collect_orphan_media', path='../outside', min_age=0)
+        self.assertTrue(os.path.exists(self.outside_file))
+
+    def test_subdirectory_is_scanned(self):
+        orphan = os.path.join(self.media_root, 'products', 'orphan.jpg')
+        open(orphan, 'wb').close()
+        stats = collect_orphan_media(root=self.media_root, subdir='products/../products', min_age_seconds=0)
+        self.assertEqual(stats['deleted'], 1)
+        self.assertFalse(os.path.exists(orphan))
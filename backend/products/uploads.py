@@ -0,0 +1,159 @@
+"""
+Streaming product image uploads
+
+`ImageUploadHandler` takes over the ``image`` field of multipart requests:
+chunks go straight to a temporary file, and the upload is checked while it
+arrives instead of after the whole body is in memory:
+
+- the declared Content-Length is checked before the body is read
+- the format and dimensions are checked as soon as the header is complete
+  (`check_image_header`), so a non-image is rejected after its first chunk
+- the running size is checked on every chunk (chunked bodies can lie about
+  their length)
+
+Under WSGI, peak memory per upload is one chunk (``IMAGE_UPLOAD_CHUNK_SIZE``)
+plus at most MAX_HEADER_BYTES of header. Under ASGI, Django reads the whole
+body into a spooled temporary file before the handler sees it, so the checks
+above only run once the body has arrived. That file stays in memory only up
+to FILE_UPLOAD_MAX_MEMORY_SIZE, which settings_asgi lowers to one chunk;
+nginx's client_max_body_size still bounds the body size. Failures are raised
+as ValidationError on ``image``, so DRF answers 400 like any other
+serializer error.
+
+Accepted uploads are staged (`stage_upload`): moved as they are into
+IMAGE_PENDING_ROOT, which is outside MEDIA_ROOT and never served, and
+recorded in `Product.pending_image`. Decoding, sanitizing and storing the
+image then runs in the task worker (``products.process_product_image``),
+which swaps `Product.image` when it is done.
+"""
+
+import os
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from django.utils import timezone
+from rest_framework import serializers
+
+from .images import MAX_HEADER_BYTES, MAX_IMAGE_BYTES, InvalidImage, check_image_header
+
+IMAGE_UPLOAD_FIELDS = ('image',)
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Boundaries, headers and the other product fields
+PENDING_UPLOAD_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+class PendingUploadStorage(FileSystemStorage):
+    """Private storage for raw uploads waiting for the task worker."""
+
+    def __init__(self):
+        super().__init__(location=getattr(settings, 'IMAGE_PENDING_ROOT', None), base_url=None)
+
+
+pending_storage = PendingUploadStorage()
+
+
+def stage_upload(data):
+    """
+    Store a validated raw upload (bytes or file) for the task worker; returns its name.
+
+    A streamed upload's temporary file is moved, not copied.
+    """
+    content = ContentFile(data) if isinstance(data, (bytes, bytearray)) else data
+    return pending_storage.save(f'{uuid.uuid4().hex}.upload', content)
+
+
+def prune_pending_uploads(max_age_seconds=PENDING_UPLOAD_MAX_AGE_SECONDS):
+    """Delete staged uploads no task picked up (e.g. failed for good); returns the count."""
+    if not os.path.isdir(pending_storage.location):
+        return 0
+    cutoff = timezone.now() - timedelta(seconds=max_age_seconds)
+    _, names = pending_storage.listdir('')
+    deleted = 0
+    for name in names:
+        if pending_storage.get_modified_time(name) < cutoff:
+            pending_storage.delete(name)
+            deleted += 1
+    return deleted
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Stream image fields to a temporary file, validating them chunk by chunk."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.chunk_size = getattr(settings, 'IMAGE_UPLOAD_CHUNK_SIZE', 64 * 1024)
+        self.active = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > MAX_IMAGE_BYTES + MULTIPART_OVERHEAD_BYTES:
+            raise serializers.ValidationError({
+                'image': ['이미지 파일이 너무 큽니다. 최대 5MB까지 업로드 가능합니다.']
+            })
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.active = field_name in IMAGE_UPLOAD_FIELDS
+        if not self.active:
+            # Other file fields go to the default handlers
+            return
+        self.file = TemporaryUploadedFile(file_name, content_type, 0, charset, content_type_extra)
+        self.header = bytearray()
+        self.header_ok = False
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if start + len(raw_data) > MAX_IMAGE_BYTES:
+            self._reject('이미지 파일이 너무 큽니다. 최대 5MB까지 업로드 가능합니다.')
+        if not self.header_ok:
+            self.header += raw_data[:MAX_HEADER_BYTES - len(self.header)]
+            self._check_header()
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        if not self.header_ok:
+            # Shorter than the header window and still not an image
+            self._check_header(complete=True)
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self):
+        if self.active:
+            self.active = False
+            self.file.close()
+
+    def _check_header(self, complete=False):
+        try:
+            self.header_ok = check_image_header(bytes(self.header))
+        except InvalidImage as e:
+            self._reject(str(e))
+        if complete and not self.header_ok:
+            self._reject('이미지를 읽을 수 없습니다.')
+        if self.header_ok:
+            self.header = bytearray()
+
+    def _reject(self, message):
+        # Closing removes the temporary file
+        self.active = False
+        self.file.close()
+        raise serializers.ValidationError({'image': [message]})
+
+
+def stream_image_uploads(view):
+    """Put ImageUploadHandler in front of the default upload handlers for a view."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request), *request.upload_handlers]
+        return view(request, *args, **kwargs)
+    return wrapped
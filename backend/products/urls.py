@@ -10,12 +10,14 @@ urlpatterns = [
     # Products
     path('', views.ProductListCreateView.as_view(), name='product_list_create'),
     path('<int:pk>/', views.ProductDetailView.as_view(), name='product_detail'),
+    path('<int:pk>/image/', views.product_image_upload_view, name='product_image_upload'),
     path('available/', views.available_products_view, name='available_products'),
     
     # Cart
     path('cart/', views.cart_view, name='cart'),
     path('cart/<int:item_id>/', views.cart_item_view, name='cart_item'),
     path('cart/clear/', views.clear_cart_view, name='clear_cart'),
+    path('cart/batch/', views.cart_batch_view, name='cart_batch'),
     path('cart/add-custom/', views.add_custom_item_view, name='add_custom_item'),
     
     # Orders
@@ -25,6 +27,7 @@ urlpatterns = [
 
     # Cashu NUT-18 payment requests
     path('payments/requests/<str:payment_id>/', views.nut18_payment_request_view, name='nut18_payment_request'),
+    path('payments/requests/<str:payment_id>/events/', views.nut18_payment_events_view, name='nut18_payment_events'),
 
     # Cashu mint proxy endpoints
     path('cashu/keys/', views.cashu_keys_view, name='cashu_keys'),
@@ -1,39 +1,71 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from django.db import transaction, models
+from rest_framework.pagination import CursorPagination
+from django.db import models
+from django.db.models import Prefetch
 from django.utils import timezone
-from django.utils.crypto import get_random_string
+from django.utils.dateparse import parse_date, parse_datetime
 from decimal import Decimal
-from datetime import timedelta
+from datetime import datetime
+from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.http import HttpResponse, HttpResponseNotAllowed
 import requests
 from .models import Category, Product, CartItem, Order, OrderItem
 from .serializers import (
-    CategorySerializer, ProductSerializer, CartItemSerializer,
+    CatalogProductSerializer, CategorySerializer, ProductSerializer, CartItemSerializer,
     OrderSerializer, CreateOrderSerializer
 )
+from .payment_store import get_payment_request_store
+from .mint_client import get_mint_client
+from .keyset_cache import get_mint_keys, note_keyset_ids, output_keyset_ids
+from .lightning_invoice import InvoiceError, get_invoice_service
+from .orders import OrderError, create_order_from_cart
+from .task_queue import enqueue
+from .uploads import stream_image_uploads
+from .catalog import catalog_changes, catalog_response
+from .cart import (
+    CartError, add_custom_item, add_to_cart, apply_cart_operations, apply_session_cart_operations,
+    clear_cart, get_cart_summary, get_product_snapshots, parse_cart_operations,
+    get_session_cart_summary, remove_cart_item,
+    session_cart_item, session_product_id, set_cart_item_quantity
+)
+
+# NUT-18 event stream limits (served by products.async_views)
+PAYMENT_EVENTS_TIMEOUT_SECONDS = 30  # Default SSE wait window per connection
+PAYMENT_EVENTS_MAX_TIMEOUT_SECONDS = 60
+PAYMENT_EVENTS_HEARTBEAT_SECONDS = 10
+
 
-PAYMENT_REQUEST_TTL_SECONDS = 10 * 60  # Keep payment data in memory for 10 minutes
-payment_request_store = {}
+class OrderCursorPagination(CursorPagination):
+    """
+    주문 목록 커서 페이지네이션 (created_at, id 기준 최신순)
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
-def cleanup_expired_payment_requests():
-    """Remove in-memory payment requests that have expired."""
-    if not payment_request_store:
-        return
+def _orders_with_items(user):
+    # One query for orders (+ user) and one for all their items (+ product)
+    return Order.objects.filter(user=user).select_related('user').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+    )
 
-    now = timezone.now()
-    expired_keys = []
-    for request_id, data in payment_request_store.items():
-        created_at = data.get('created_at')
-        if not created_at:
-            continue
-        if now - created_at > timedelta(seconds=PAYMENT_REQUEST_TTL_SECONDS):
-            expired_keys.append(request_id)
 
-    for request_id in expired_keys:
-        payment_request_store.pop(request_id, None)
+def _parse_order_date(value, end_of_day=False):
+    """Parse an ISO date or datetime query parameter into an aware datetime."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, datetime.max.time() if end_of_day else datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
 class CategoryListCreateView(generics.ListCreateAPIView):
@@ -61,24 +93,33 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
+@method_decorator(stream_image_uploads, name='dispatch')
 class ProductListCreateView(generics.ListCreateAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def list(self, request, *args, **kwargs):
+        # Versioned catalog: ETag/304 and cached payload per category
+        return catalog_response(
+            request, 'product_list',
+            lambda version: list(CatalogProductSerializer(
+                self.get_queryset(), many=True, context=self.get_serializer_context()
+            ).data)
+        )
+    
     def get_queryset(self):
-        # Show only products created by the current user, excluding custom items
+        # Show only products created by the current user
         queryset = Product.objects.filter(
             created_by=self.request.user, 
             is_available=True
-        ).exclude(
-            image_url='custom_item'  # Exclude custom items from direct input
-        )
+        ).select_related('category', 'created_by')
         category = self.request.query_params.get('category')
         if category:
             queryset = queryset.filter(category_id=category)
         return queryset.order_by('-created_at')
 
 
+@method_decorator(stream_image_uploads, name='dispatch')
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -86,6 +127,47 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         # Users can only access their own products
         return Product.objects.filter(created_by=self.request.user)
+    
+    def perform_destroy(self, instance):
+        variants = instance.image_variants
+        super().perform_destroy(instance)
+        if variants:
+            enqueue('products.delete_image_variants', {'variants': variants})
+
+
+@stream_image_uploads
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def product_image_upload_view(request, pk):
+    """
+    Replace a product image with a multipart upload (field `image`)
+
+    The file is streamed to disk and validated while it arrives; the
+    base64 `image_url` path of the product endpoints still works.
+    """
+    try:
+        product = Product.objects.get(pk=pk, created_by=request.user)
+    except Product.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': '상품을 찾을 수 없습니다.'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if 'image' not in request.FILES:
+        return Response({
+            'success': False,
+            'message': '이미지 파일(image)이 필요합니다.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = ProductSerializer(
+        product, data={'image': request.FILES['image']}, partial=True, context={'request': request}
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return Response({
+        'success': True,
+        'product': serializer.data
+    })
 
 
 @api_view(['GET'])
@@ -93,24 +175,72 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
 def available_products_view(request):
     """
     Get available products for the current user (read-only view for shopping)
-    This endpoint shows only products created by the current user, excluding custom items
-    """
-    products = Product.objects.filter(
-        created_by=request.user,
-        is_available=True
-    ).exclude(
-        image_url='custom_item'  # Exclude custom items from direct input
-    ).order_by('-created_at')
+    This endpoint shows only products created by the current user
+
+    `?since=<version>` returns only what changed after that catalog version:
+    changed products/categories plus the IDs of deleted (or no longer
+    listed) ones. Every response carries the current `version`.
+    """
+    since = request.query_params.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+            if since < 0:
+                raise ValueError(since)
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'since는 0 이상의 정수여야 합니다.'
+            }, status=status.HTTP_400_BAD_REQUEST)
     
-    category = request.query_params.get('category')
-    if category:
-        products = products.filter(category_id=category)
+    def available_products():
+        products = Product.objects.filter(
+            created_by=request.user,
+            is_available=True
+        ).select_related('category', 'created_by').order_by('-created_at')
+        
+        category = request.query_params.get('category')
+        if category:
+            products = products.filter(category_id=category)
+        return products
     
-    serializer = ProductSerializer(products, many=True, context={'request': request})
-    return Response({
-        'success': True,
-        'products': serializer.data
-    })
+    def build_payload(version):
+        if since is None or since > version:
+            # Full catalog (also when the kiosk's version is from another database)
+            serializer = CatalogProductSerializer(available_products(), many=True, context={'request': request})
+            payload = {
+                'success': True,
+                'version': version,
+                'products': list(serializer.data)
+            }
+            if since is not None:
+                payload['full'] = True
+            return payload
+        
+        changes = catalog_changes(request.user.id, since)
+        changed_product_ids = set(changes['product'])
+        products = available_products().filter(id__in=changed_product_ids)
+        serializer = CatalogProductSerializer(products, many=True, context={'request': request})
+        products_data = list(serializer.data)
+        listed_ids = {product['id'] for product in products_data}
+        
+        category_ids = [category_id for category_id, deleted in changes['category'].items() if not deleted]
+        categories = Category.objects.filter(id__in=category_ids).select_related('created_by').order_by('name')
+        return {
+            'success': True,
+            'version': version,
+            'full': False,
+            'products': products_data,
+            # Deleted, made unavailable, or moved out of the requested category
+            'deleted_products': sorted(changed_product_ids - listed_ids),
+            'categories': list(CategorySerializer(categories, many=True).data),
+            'deleted_categories': sorted(
+                category_id for category_id, deleted in changes['category'].items() if deleted
+            )
+        }
+    
+    # Versioned catalog: ETag/304 and cached payload per category/since
+    return catalog_response(request, 'available_products', build_payload)
 
 
 @api_view(['GET'])
@@ -140,65 +270,12 @@ def cart_view(request):
     """
     if request.method == 'GET':
         if request.user.is_authenticated:
-            # Authenticated user - use database cart
-            cart_items = CartItem.objects.filter(user=request.user)
-            serializer = CartItemSerializer(cart_items, many=True)
-            subtotal = sum(item.total_price for item in cart_items)
-            items_data = serializer.data
+            # Authenticated user - use database cart (cached summary)
+            return Response({'success': True, **get_cart_summary(request.user)})
         else:
-            # Anonymous user - use session cart
+            # Anonymous user - use session cart (one product query for the whole cart)
             session_cart = request.session.get('cart', {})
-            items_data = []
-            subtotal = 0
-            
-            for product_id, item_data in session_cart.items():
-                try:
-                    # Check if this is a custom item
-                    if isinstance(item_data, dict) and item_data.get('is_custom'):
-                        # Custom item handling
-                        total_price = float(item_data['price']) * item_data['quantity']
-                        items_data.append({
-                            'id': f"session_{product_id}",
-                            'product': {
-                                'id': product_id,
-                                'name': item_data['name'],
-                                'price': str(item_data['price']),
-                                'image_url': None,
-                            },
-                            'quantity': item_data['quantity'],
-                            'total_price': str(total_price),
-                            'is_custom': True
-                        })
-                        subtotal += total_price
-                    else:
-                        # Regular product handling
-                        product = Product.objects.get(id=product_id, is_available=True)
-                        total_price = product.price * item_data['quantity']
-                        items_data.append({
-                            'id': f"session_{product_id}",
-                            'product': {
-                                'id': product.id,
-                                'name': product.name,
-                                'price': str(product.price),
-                                'image_url': product.image.url if product.image else None,
-                            },
-                            'quantity': item_data['quantity'],
-                            'total_price': str(total_price)
-                        })
-                        subtotal += total_price
-                except Product.DoesNotExist:
-                    # Skip invalid regular products
-                    continue
-                except (KeyError, ValueError, TypeError):
-                    # Skip invalid custom items
-                    continue
-        
-        return Response({
-            'success': True,
-            'items': items_data,
-            'subtotal': str(subtotal),
-            'item_count': len(items_data)
-        })
+            return Response({'success': True, **get_session_cart_summary(session_cart)})
     
     elif request.method == 'POST':
         product_id = request.data.get('product_id')
@@ -215,16 +292,7 @@ def cart_view(request):
         
         if request.user.is_authenticated:
             # Authenticated user - use database cart
-            cart_item, created = CartItem.objects.get_or_create(
-                user=request.user,
-                product=product,
-                defaults={'quantity': quantity}
-            )
-            
-            if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
-            
+            cart_item = add_to_cart(request.user, product, quantity)
             item_data = CartItemSerializer(cart_item).data
         else:
             # Anonymous user - use session cart
@@ -293,26 +361,15 @@ def cart_item_view(request, item_id):
                     'message': '장바구니에서 제거되었습니다.'
                 })
             else:
-                try:
-                    product = Product.objects.get(id=product_id, is_available=True)
-                    total_price = product.price * quantity
-                    item_data = {
-                        'id': f"session_{product_id}",
-                        'product': {
-                            'id': product.id,
-                            'name': product.name,
-                            'price': str(product.price),
-                            'image_url': product.image.url if product.image else None,
-                        },
-                        'quantity': quantity,
-                        'total_price': str(total_price)
-                    }
+                snapshots = get_product_snapshots([session_product_id(product_id)])
+                result = session_cart_item(product_id, session_cart[product_id], snapshots)
+                if result:
                     return Response({
                         'success': True,
                         'message': '수량이 변경되었습니다.',
-                        'item': item_data
+                        'item': result[0]
                     })
-                except Product.DoesNotExist:
+                else:
                     return Response({
                         'success': False,
                         'message': '상품을 찾을 수 없습니다.'
@@ -345,15 +402,12 @@ def cart_item_view(request, item_id):
         
         if request.method == 'PUT':
             quantity = int(request.data.get('quantity', 1))
-            if quantity <= 0:
-                cart_item.delete()
+            if set_cart_item_quantity(cart_item, quantity) is None:
                 return Response({
                     'success': True,
                     'message': '장바구니에서 제거되었습니다.'
                 })
             else:
-                cart_item.quantity = quantity
-                cart_item.save()
                 return Response({
                     'success': True,
                     'message': '수량이 변경되었습니다.',
@@ -361,13 +415,52 @@ def cart_item_view(request, item_id):
                 })
         
         elif request.method == 'DELETE':
-            cart_item.delete()
+            remove_cart_item(cart_item)
             return Response({
                 'success': True,
                 'message': '장바구니에서 제거되었습니다.'
             })
 
 
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def cart_batch_view(request):
+    """
+    장바구니 일괄 변경 (add/set/remove 작업 목록을 한 번에 적용)
+
+    Body: {"operations": [{"action": "add", "product_id": 1, "quantity": 2},
+                          {"action": "set", "product_id": 2, "quantity": 0},
+                          {"action": "remove", "product_id": "custom_1a2b3c4d"},
+                          {"action": "set", "item_id": 7, "quantity": 3}]}
+    set/remove can name a line by its cart item id (the only way to reach
+    custom lines in a logged-in cart). All operations are applied or none
+    are; the final cart is returned.
+    """
+    # A JSON list (or scalar) body has no 'operations'; rejected as 400 below
+    data = request.data if isinstance(request.data, dict) else {}
+    try:
+        operations = parse_cart_operations(data.get('operations'))
+        if request.user.is_authenticated:
+            apply_cart_operations(request.user, operations)
+            summary = get_cart_summary(request.user)
+        else:
+            session_cart = apply_session_cart_operations(request.session.get('cart', {}), operations)
+            request.session['cart'] = session_cart
+            request.session.modified = True
+            summary = get_session_cart_summary(session_cart)
+    except CartError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=e.status_code)
+    
+    return Response({
+        'success': True,
+        'message': '장바구니가 업데이트되었습니다.',
+        **summary
+    })
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def clear_cart_view(request):
@@ -375,7 +468,7 @@ def clear_cart_view(request):
     장바구니 비우기
     """
     if request.user.is_authenticated:
-        CartItem.objects.filter(user=request.user).delete()
+        clear_cart(request.user)
     else:
         request.session['cart'] = {}
         request.session.modified = True
@@ -413,41 +506,9 @@ def add_custom_item_view(request):
     
     try:
         if request.user.is_authenticated:
-            # Authenticated user - use database cart
-            # Create a temporary product for the custom item
-            custom_product = Product.objects.create(
-                name=data.get('name'),
-                description=data.get('description', ''),
-                price=price,
-                category=None,  # No category for custom items
-                stock_quantity=1,  # Always 1 for custom items
-                is_available=True,
-                created_by=request.user,
-                # Add a flag to identify custom items
-                image_url='custom_item'  # Use this as a flag
-            )
-            
-            # Check if item already exists in cart
-            existing_item = CartItem.objects.filter(
-                user=request.user, 
-                product=custom_product
-            ).first()
-            
-            if existing_item:
-                # Update quantity for existing item
-                existing_item.quantity += 1
-                existing_item.save()
-                serializer = CartItemSerializer(existing_item)
-                item_data = serializer.data
-            else:
-                # Create new cart item
-                cart_item = CartItem.objects.create(
-                    user=request.user,
-                    product=custom_product,
-                    quantity=1
-                )
-                serializer = CartItemSerializer(cart_item)
-                item_data = serializer.data
+            # Authenticated user - custom line on the database cart (no Product row)
+            cart_item = add_custom_item(request.user, data.get('name'), Decimal(str(price)))
+            item_data = CartItemSerializer(cart_item).data
         else:
             # Anonymous user - use session cart
             session_cart = request.session.get('cart', {})
@@ -509,70 +570,62 @@ def create_order_view(request):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    cart_items = CartItem.objects.filter(user=request.user)
-    if not cart_items.exists():
+    try:
+        order = create_order_from_cart(
+            request.user,
+            serializer.validated_data['payment_method'],
+            serializer.validated_data.get('discount_percentage', 0)
+        )
+    except OrderError as e:
         return Response({
             'success': False,
-            'message': '장바구니가 비어있습니다.'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
-    try:
-        with transaction.atomic():
-            # Calculate totals
-            subtotal = sum(item.total_price for item in cart_items)
-            discount_percentage = serializer.validated_data.get('discount_percentage', 0)
-            discount_amount = subtotal * (discount_percentage / 100)
-            total_amount = subtotal - discount_amount
-            
-            # Create order
-            order = Order.objects.create(
-                user=request.user,
-                order_number=get_random_string(10).upper(),
-                payment_method=serializer.validated_data['payment_method'],
-                subtotal=subtotal,
-                discount_percentage=discount_percentage,
-                discount_amount=discount_amount,
-                total_amount=total_amount,
-                status='pending'
-            )
-            
-            # Create order items
-            for cart_item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    unit_price=cart_item.product.price,
-                    total_price=cart_item.total_price
-                )
-            
-            # Clear cart
-            cart_items.delete()
-            
-            return Response({
-                'success': True,
-                'message': '주문이 생성되었습니다.',
-                'order': OrderSerializer(order).data
-            }, status=status.HTTP_201_CREATED)
-    
+            'message': str(e)
+        }, status=e.status_code)
     except Exception as e:
         return Response({
             'success': False,
             'message': f'주문 생성 중 오류가 발생했습니다: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    order = _orders_with_items(request.user).get(id=order.id)
+    return Response({
+        'success': True,
+        'message': '주문이 생성되었습니다.',
+        'order': OrderSerializer(order).data
+    }, status=status.HTTP_201_CREATED)
+
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def order_list_view(request):
     """
     사용자 주문 목록 조회
+
+    Query params: cursor, page_size, created_from, created_to (ISO date/datetime)
     """
-    orders = Order.objects.filter(user=request.user)
-    serializer = OrderSerializer(orders, many=True)
+    orders = _orders_with_items(request.user)
+
+    try:
+        created_from = request.query_params.get('created_from')
+        if created_from:
+            orders = orders.filter(created_at__gte=_parse_order_date(created_from))
+        created_to = request.query_params.get('created_to')
+        if created_to:
+            orders = orders.filter(created_at__lte=_parse_order_date(created_to, end_of_day=True))
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': '잘못된 날짜 형식입니다. (예: 2024-01-31 또는 2024-01-31T09:00:00)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = OrderCursorPagination()
+    page = paginator.paginate_queryset(orders, request)
+    serializer = OrderSerializer(page, many=True)
     return Response({
         'success': True,
-        'orders': serializer.data
+        'orders': serializer.data,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link()
     })
 
 
@@ -583,7 +636,7 @@ def order_detail_view(request, order_id):
     주문 상세 조회
     """
     try:
-        order = Order.objects.get(id=order_id, user=request.user)
+        order = _orders_with_items(request.user).get(id=order_id)
         serializer = OrderSerializer(order)
         return Response({
             'success': True,
@@ -604,7 +657,7 @@ def nut18_payment_request_view(request, payment_id):
     """
     Receive and check Cashu NUT-18 payment requests (HTTP POST transport)
     """
-    cleanup_expired_payment_requests()
+    payment_requests = get_payment_request_store()
 
     if request.method == 'POST':
         payload = request.data or {}
@@ -635,39 +688,57 @@ def nut18_payment_request_view(request, payment_id):
             normalized_proofs.append(proof)
 
         timestamp = timezone.now().isoformat()
-        payment_request_store[payment_id] = {
+        payment_requests.set(payment_id, {
             'proofs': normalized_proofs,
             'amount': total_amount,
             'unit': payload.get('unit') or 'sat',
             'mint': payload.get('mint') or '',
             'memo': payload.get('memo') or '',
             'timestamp': timestamp,
-            'created_at': timezone.now(),
-        }
+        })
 
         return Response({'success': True})
 
-    data = payment_request_store.get(payment_id)
+    data = payment_requests.get(payment_id)
     if data:
         consume = request.query_params.get('consume')
-        response_payload = {
-            'paid': True,
-            'proofs': data.get('proofs', []),
-            'amount': data.get('amount', 0),
-            'unit': data.get('unit', 'sat'),
-            'mint': data.get('mint', ''),
-            'memo': data.get('memo', ''),
-            'timestamp': data.get('timestamp'),
-        }
+        response_payload = _paid_payment_response(data)
 
         if consume and consume.lower() == 'true':
-            payment_request_store.pop(payment_id, None)
+            payment_requests.pop(payment_id)
 
         return Response(response_payload)
 
     return Response({'paid': False})
 
 
+def nut18_payment_events_view(request, payment_id):
+    """
+    NUT-18 payment event stream on the sync (WSGI) stack: always 204
+
+    A stream would hold one of the few sync workers for its whole lifetime,
+    so a handful of kiosks showing a QR code would block the wallet's proofs
+    POST and all other traffic. 204 tells EventSource not to reconnect, and
+    the kiosk falls back to polling nut18_payment_request_view. The stream
+    itself is served by products.async_views under kiosk_backend.asgi.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+def _paid_payment_response(data):
+    return {
+        'paid': True,
+        'proofs': data.get('proofs', []),
+        'amount': data.get('amount', 0),
+        'unit': data.get('unit', 'sat'),
+        'mint': data.get('mint', ''),
+        'memo': data.get('memo', ''),
+        'timestamp': data.get('timestamp'),
+    }
+
+
 @csrf_exempt
 @api_view(['GET'])
 @authentication_classes([])
@@ -684,20 +755,20 @@ def cashu_keys_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Normalize mint URL
-        mint_url = mint_url.rstrip('/')
-        keys_url = f"{mint_url}/v1/keys"
-
-        response = requests.get(keys_url, timeout=30)
-        response.raise_for_status()
-
-        return Response(response.json())
+        entry = get_mint_keys(mint_url)
     except requests.exceptions.RequestException as e:
         return Response({
             'success': False,
             'error': f'Failed to fetch mint keys: {str(e)}'
         }, status=status.HTTP_502_BAD_GATEWAY)
 
+    if request.headers.get('If-None-Match') == entry['etag']:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entry['keys'])
+    response['ETag'] = entry['etag']
+    return response
+
 
 @csrf_exempt
 @api_view(['POST'])
@@ -724,9 +795,9 @@ def cashu_swap_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Normalize mint URL
-        mint_url = mint_url.rstrip('/')
-        swap_url = f"{mint_url}/v1/swap"
+        note_keyset_ids(mint_url, output_keyset_ids(outputs))
+        mint_client = get_mint_client()
+        swap_url = mint_client.url(mint_url, 'v1/swap')
 
         payload = {
             'inputs': inputs,
@@ -751,7 +822,7 @@ def cashu_swap_view(request):
         else:
             print(f"[DEBUG SWAP] First output sample: None")
 
-        response = requests.post(swap_url, json=payload, timeout=30)
+        response = mint_client.post(mint_url, 'v1/swap', payload)
 
         print(f"[DEBUG SWAP] Response status: {response.status_code}")
         print(f"[DEBUG SWAP] Response text: {response.text}")
@@ -816,16 +887,12 @@ def cashu_melt_quote_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Normalize mint URL
-        mint_url = mint_url.rstrip('/')
-        quote_url = f"{mint_url}/v1/melt/quote/bolt11"
-
         payload = {
             'request': bolt11,
             'unit': 'sat'
         }
 
-        response = requests.post(quote_url, json=payload, timeout=30)
+        response = get_mint_client().post(mint_url, 'v1/melt/quote/bolt11', payload)
         response.raise_for_status()
 
         return Response(response.json())
@@ -862,10 +929,6 @@ def cashu_melt_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Normalize mint URL
-        mint_url = mint_url.rstrip('/')
-        melt_url = f"{mint_url}/v1/melt/bolt11"
-
         payload = {
             'quote': quote,
             'inputs': inputs
@@ -873,8 +936,9 @@ def cashu_melt_view(request):
 
         if outputs:
             payload['outputs'] = outputs
+            note_keyset_ids(mint_url, output_keyset_ids(outputs))
 
-        response = requests.post(melt_url, json=payload, timeout=30)
+        response = get_mint_client().post(mint_url, 'v1/melt/bolt11', payload)
         response.raise_for_status()
 
         return Response(response.json())
@@ -959,58 +1023,15 @@ def lightning_address_quote_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Parse Lightning address (user@domain.com)
-        if '@' in address:
-            user, domain = address.split('@')
-            # Fetch LNURL from .well-known endpoint
-            wellknown_url = f"https://{domain}/.well-known/lnurlp/{user}"
-
-            response = requests.get(wellknown_url, timeout=30)
-            response.raise_for_status()
-            lnurl_data = response.json()
-
-            callback_url = lnurl_data.get('callback')
-            if not callback_url:
-                return Response({
-                    'success': False,
-                    'error': 'Invalid Lightning address response'
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            # Request invoice with amount (in millisats)
-            amount_msats = int(amount) * 1000
-            invoice_response = requests.get(
-                callback_url,
-                params={'amount': amount_msats},
-                timeout=30
-            )
-            invoice_response.raise_for_status()
-            invoice_data = invoice_response.json()
-
-            invoice = invoice_data.get('pr')
-            if not invoice:
-                return Response({
-                    'success': False,
-                    'error': 'Failed to get invoice from Lightning address'
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            return Response({
-                'success': True,
-                'request': invoice,
-                'invoice': invoice
-            })
-        else:
-            return Response({
-                'success': False,
-                'error': 'Invalid Lightning address format'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-    except requests.exceptions.RequestException as e:
+        invoice = get_invoice_service().request_invoice(address, amount)
+    except InvoiceError as e:
         return Response({
             'success': False,
-            'error': f'Failed to process Lightning address: {str(e)}'
-        }, status=status.HTTP_502_BAD_GATEWAY)
-    except Exception as e:
-        return Response({
-            'success': False,
-            'error': f'Error processing Lightning address: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            'error': str(e)
+        }, status=e.status_code)
+
+    return Response({
+        'success': True,
+        'request': invoice,
+        'invoice': invoice
+    })
@@ -121,6 +121,8 @@ if [ -f "package.json" ]; then
 fi
 
 # Setup systemd service for Django backend
+# Served through ASGI (uvicorn workers): slow mints, LNURL services and open
+# payment event streams park coroutines instead of holding sync workers
 SERVICE_NAME="shop-django-backend"
 SERVICE_FILE="/etc/systemd/system/$SERVICE_NAME.service"
 
@@ -137,8 +139,8 @@ Group=www-data
 WorkingDirectory=$CURRENT_DIR/backend
 Environment="PATH=$CURRENT_DIR/backend/venv/bin:/usr/local/bin:/usr/bin:/bin"
 Environment="PYTHONPATH=$CURRENT_DIR/backend"
-Environment="DJANGO_SETTINGS_MODULE=kiosk_backend.settings"
-ExecStart=$CURRENT_DIR/backend/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:8001 kiosk_backend.wsgi:application
+Environment="DJANGO_SETTINGS_MODULE=kiosk_backend.settings_asgi"
+ExecStart=$CURRENT_DIR/backend/venv/bin/gunicorn -k uvicorn.workers.UvicornWorker --workers 3 --bind 127.0.0.1:8001 kiosk_backend.asgi:application
 ExecReload=/bin/kill -s HUP \$MAINPID
 KillMode=mixed
 TimeoutStopSec=5
@@ -153,8 +155,39 @@ StandardError=journal
 WantedBy=multi-user.target
 EOF
 
+# Background task worker (image variants, expiry sweeps)
+WORKER_SERVICE_NAME="shop-django-worker"
+WORKER_SERVICE_FILE="/etc/systemd/system/$WORKER_SERVICE_NAME.service"
+
+echo "백그라운드 작업 워커 서비스 생성/업데이트 중..."
+sudo tee $WORKER_SERVICE_FILE > /dev/null <<EOF
+[Unit]
+Description=Shop Django Background Task Worker
+After=network.target
+
+[Service]
+Type=simple
+User=$USER
+Group=www-data
+WorkingDirectory=$CURRENT_DIR/backend
+Environment="PATH=$CURRENT_DIR/backend/venv/bin:/usr/local/bin:/usr/bin:/bin"
+Environment="PYTHONPATH=$CURRENT_DIR/backend"
+Environment="DJANGO_SETTINGS_MODULE=kiosk_backend.settings"
+ExecStart=$CURRENT_DIR/backend/venv/bin/python manage.py run_task_worker
+KillMode=mixed
+TimeoutStopSec=30
+Restart=always
+RestartSec=10
+StandardOutput=journal
+StandardError=journal
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 sudo systemctl daemon-reload
 sudo systemctl enable $SERVICE_NAME
+sudo systemctl enable $WORKER_SERVICE_NAME
 echo "Django 서비스 생성 및 활성화 완료"
 
 # Start/restart the service
@@ -164,6 +197,7 @@ sudo systemctl stop $SERVICE_NAME 2>/dev/null || true
 
 echo "Django 백엔드 서비스 시작 중..."
 sudo systemctl start $SERVICE_NAME
+sudo systemctl restart $WORKER_SERVICE_NAME
 
 # Wait for service to start
 sleep 3
@@ -187,7 +221,7 @@ else
     
     # Start Gunicorn manually in background
     echo "포트 8001에서 Gunicorn 수동 시작 중..."
-    nohup $CURRENT_DIR/backend/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:8001 kiosk_backend.wsgi:application > /var/log/gunicorn.log 2>&1 &
+    DJANGO_SETTINGS_MODULE=kiosk_backend.settings_asgi nohup $CURRENT_DIR/backend/venv/bin/gunicorn -k uvicorn.workers.UvicornWorker --workers 3 --bind 127.0.0.1:8001 kiosk_backend.asgi:application > /var/log/gunicorn.log 2>&1 &
     
     # Wait and check if port 8001 is responding
     sleep 5
@@ -276,6 +310,14 @@ server {
         add_header Cache-Control "public, max-age=2592000";
     }
 
+    # Content-addressed product images: a URL never changes content
+    location ^~ /media/products/cas/ {
+        alias /var/www/pos/media/products/cas/;
+        access_log off;
+        expires max;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
     # Serve media files
     location /media/ {
         alias /var/www/pos/media/;
@@ -62,6 +62,11 @@ run_backend() {
       log "Skipping migrations (SKIP_MIGRATIONS=1)"
     fi
 
+    log "Starting background task worker"
+    python manage.py run_task_worker &
+    WORKER_PID=$!
+    trap 'kill "$WORKER_PID" 2>/dev/null || true' EXIT
+
     ensure_port_free 8001
     log "Starting Django dev server on http://localhost:8001"
     python manage.py runserver 0.0.0.0:8001
@@ -136,6 +136,8 @@ export const translations: Record<LanguageCode, TranslationMap> = {
     'admin.userList.viewDetailShort': '상세',
     'admin.userList.deleteUser': '사용자 삭제',
     'admin.userList.deleteUserShort': '삭제',
+    'admin.userList.searchPlaceholder': '사용자명 또는 이메일 검색',
+    'admin.userList.loadMore': '더 보기',
     'admin.error.fetchFailed': '사용자 목록을 불러오는데 실패했습니다',
     'admin.error.fetchError': '사용자 목록을 불러오는 중 오류가 발생했습니다',
     'admin.error.detailLoadFailed': '사용자 상세 로드 실패:',
@@ -597,6 +599,8 @@ export const translations: Record<LanguageCode, TranslationMap> = {
     'admin.userList.viewDetailShort': 'Details',
     'admin.userList.deleteUser': 'Delete User',
     'admin.userList.deleteUserShort': 'Delete',
+    'admin.userList.searchPlaceholder': 'Search username or email',
+    'admin.userList.loadMore': 'Load more',
     'admin.error.fetchFailed': 'Failed to load user list',
     'admin.error.fetchError': 'An error occurred while loading the user list',
     'admin.error.detailLoadFailed': 'Failed to load user details:',
@@ -1087,6 +1091,8 @@ export const translations: Record<LanguageCode, TranslationMap> = {
     'admin.userList.viewDetailShort': '詳細',
     'admin.userList.deleteUser': 'ユーザー削除',
     'admin.userList.deleteUserShort': '削除',
+    'admin.userList.searchPlaceholder': 'ユーザー名またはメールで検索',
+    'admin.userList.loadMore': 'もっと見る',
     'admin.error.fetchFailed': 'ユーザーリストの読み込みに失敗しました',
     'admin.error.fetchError': 'ユーザーリストの読み込み中にエラーが発生しました',
     'admin.error.detailLoadFailed': 'ユーザー詳細の読み込みに失敗:',
@@ -176,10 +176,14 @@ export interface Product {
   image_url?: string
   image?: string
   image_display_url: string
+  image_variants?: Record<string, { url: string; width: number; height: number }>
+  image_srcset?: string
+  image_pending?: boolean  // new image still being processed; image_* fields show the previous one
   category?: number
   category_name?: string
   is_available: boolean
   stock_quantity: number
+  track_stock?: boolean  // stock_quantity is only enforced at checkout when true
   created_by?: number
   created_by_username?: string
   created_at: string
@@ -188,12 +192,13 @@ export interface Product {
 
 export interface CartItem {
   id: number
-  product: number
+  product: number | null  // null for custom amount items
   product_name: string
   product_price: number
   product_image: string
   quantity: number
   total_price: number
+  is_custom?: boolean
   created_at: string
   updated_at: string
 }
@@ -216,7 +221,7 @@ export interface Order {
 
 export interface OrderItem {
   id: number
-  product: number
+  product: number | null
   product_name: string
   quantity: number
   unit_price: number
@@ -318,24 +323,35 @@ export const authAPI = {
 
 // Admin API
 export const adminAPI = {
-  async getUsersList(): Promise<{ success: boolean; users: (User & { product_count: number })[]; total_count: number; message?: string }> {
+  async getUsersList(params: { page?: number; page_size?: number; search?: string } = {}): Promise<{
+    success: boolean;
+    users: (User & { product_count: number })[];
+    total_count: number;
+    page?: number;
+    num_pages?: number;
+    has_next?: boolean;
+    message?: string
+  }> {
     try {
-      const response = await apiClient.get('/auth/admin/users/')
+      const response = await apiClient.get('/auth/admin/users/', { params })
       return response.data
     } catch (error: any) {
       return error.response?.data || { success: false, users: [], total_count: 0, message: '서버 오류가 발생했습니다' }
     }
   },
 
-  async getUserDetail(userId: number): Promise<{ 
+  async getUserDetail(userId: number, page = 1): Promise<{ 
     success: boolean; 
     user?: User; 
     products?: any[]; 
     product_count?: number; 
+    page?: number;
+    num_pages?: number;
+    has_next?: boolean;
     message?: string 
   }> {
     try {
-      const response = await apiClient.get(`/auth/admin/users/${userId}/`)
+      const response = await apiClient.get(`/auth/admin/users/${userId}/`, { params: { page } })
       return response.data
     } catch (error: any) {
       return error.response?.data || { success: false, message: '서버 오류가 발생했습니다' }
@@ -543,6 +559,35 @@ export const productsAPI = {
     }
   },
 
+  async uploadProductImage(id: number, imageFile: File): Promise<{ success: boolean; product?: Product; message?: string }> {
+    try {
+      const formData = new FormData()
+      formData.append('image', imageFile)
+
+      const response = await apiClient.post(`/products/${id}/image/`, formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+        timeout: 120000, // 2 minutes for file upload
+      })
+      return { success: true, product: response.data.product }
+    } catch (error: any) {
+      console.error('상품 이미지 업로드 오류:', error.response?.data)
+
+      if (error.response?.data?.image) {
+        const imageError = Array.isArray(error.response.data.image)
+          ? error.response.data.image[0]
+          : error.response.data.image
+        return { success: false, message: imageError }
+      }
+
+      return {
+        success: false,
+        message: error.response?.data?.message || '이미지 업로드에 실패했습니다'
+      }
+    }
+  },
+
   async deleteProduct(id: number): Promise<{ success: boolean; message?: string }> {
     try {
       await apiClient.delete(`/products/${id}/`)
@@ -647,7 +692,7 @@ export const ordersAPI = {
     payment_method: string
     discount_percentage: number
     cart_items: Array<{
-      product_id: number
+      product_id: number | null
       quantity: number
       unit_price: number
     }>
@@ -93,6 +93,24 @@ export const useProductStore = defineStore('products', () => {
     }
   }
 
+  // New images are processed by the backend task worker after the request
+  // returns (image_pending); reload the product once its image is swapped
+  async function refreshWhenImageReady(product: Product, attempts = 30) {
+    if (!product.image_pending) return
+    for (let attempt = 0; attempt < attempts; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, 1000))
+      const latest = await productsAPI.getProduct(product.id)
+      if (!latest) return
+      if (!latest.image_pending) {
+        const index = products.value.findIndex(p => p.id === product.id)
+        if (index > -1) {
+          products.value[index] = latest
+        }
+        return
+      }
+    }
+  }
+
   // Add new product
   async function addProduct(productData: {
     name: string
@@ -115,6 +133,7 @@ export const useProductStore = defineStore('products', () => {
 
       if (result.success && result.product) {
         products.value.push(result.product)
+        refreshWhenImageReady(result.product)
         return { success: true, product: result.product }
       } else {
         error.value = result.message || '상품 추가에 실패했습니다'
@@ -146,6 +165,7 @@ export const useProductStore = defineStore('products', () => {
 
       if (result.success && result.product) {
         products.value.push(result.product)
+        refreshWhenImageReady(result.product)
         return { success: true, product: result.product }
       } else {
         error.value = result.message || '상품 추가에 실패했습니다'
@@ -172,6 +192,7 @@ export const useProductStore = defineStore('products', () => {
         if (index > -1) {
           products.value[index] = result.product
         }
+        refreshWhenImageReady(result.product)
         return { success: true, product: result.product }
       } else {
         error.value = result.message || '상품 수정에 실패했습니다'
@@ -185,6 +206,33 @@ export const useProductStore = defineStore('products', () => {
     }
   }
 
+  // Replace product image with a multipart upload
+  async function uploadProductImage(id: number, imageFile: File): Promise<{ success: boolean; message?: string; product?: Product }> {
+    isLoading.value = true
+    error.value = null
+
+    try {
+      const result = await productsAPI.uploadProductImage(id, imageFile)
+
+      if (result.success && result.product) {
+        const index = products.value.findIndex(p => p.id === id)
+        if (index > -1) {
+          products.value[index] = result.product
+        }
+        refreshWhenImageReady(result.product)
+        return { success: true, product: result.product }
+      } else {
+        error.value = result.message || '이미지 업로드에 실패했습니다'
+        return { success: false, message: error.value || '오류가 발생했습니다' }
+      }
+    } catch (err: any) {
+      error.value = err.message || '이미지 업로드에 실패했습니다'
+      return { success: false, message: error.value || '이미지 업로드에 실패했습니다' }
+    } finally {
+      isLoading.value = false
+    }
+  }
+
   // Delete product
   async function deleteProduct(id: number): Promise<{ success: boolean; message?: string }> {
     isLoading.value = true
@@ -260,6 +308,7 @@ export const useProductStore = defineStore('products', () => {
     addProduct,
     addProductWithFile,
     updateProduct,
+    uploadProductImage,
     deleteProduct,
     getProduct,
     clearError,